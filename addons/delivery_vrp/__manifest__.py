@@ -1,6 +1,6 @@
 {
     'name': 'Vehicle Routing Problem (VRP)',
-    'version': '18.0.1.0',
+    'version': '18.0.1.1',
     'category': 'Operations',
     'summary': 'Optimisation des tournées de véhicules avec Ortools',
     'description': """
@@ -23,7 +23,7 @@
         - Rapports détaillés
     """,
     'author': 'Khadija',
-    'depends': ['base', 'web', 'contacts','sale','fleet','stock'],
+    'depends': ['base', 'web', 'bus', 'contacts','sale','fleet','stock'],
     'external_dependencies': {
         'python': ['matplotlib', 'numpy' ,'ortools'],
     },
@@ -31,9 +31,11 @@
      'security/vrp_security.xml',        # 1. Sécurité d'abord  
      'security/ir.model.access.csv',     # 2. Permissions des modèles  
      'data/vrp_data.xml',               # 3. Données de base  
+     'data/vrp_cron.xml',
      'views/vrp_vehicle_views.xml',      # 4. Vues des véhicules  
      'views/vrp_customer_views.xml',     # 5. Vues des clients  
      'views/vrp_map_view.xml',
+     'views/vrp_route_optimization_views.xml',
      'views/res_config_settings_views.xml', # 6. Configuration  
      'views/vrp_menus.xml',             # 7. Menus en dernier  
 ],
@@ -43,6 +45,8 @@
         'delivery_vrp/static/src/css/vrp_route_map.css',  
         'delivery_vrp/static/src/js/vrp_route_map_widget.js',  
         'delivery_vrp/static/src/xml/vrp_route_map_template.xml',    
+        'delivery_vrp/static/src/js/vrp_optimization_progress.js',
+        'delivery_vrp/static/src/xml/vrp_optimization_progress.xml',
     ],    
 },
 
@@ -0,0 +1,7 @@
+# migrations/18.0.1.1/post-migrate.py - RATTRAPAGE DES COLONNES GÉOGRAPHIQUES DES PARTENAIRES
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['res.partner']._vrp_backfill_geo_columns()
@@ -4,8 +4,10 @@ from . import sale_order
 from . import sale_order_enhanced  
 from . import vrp_optimizer  
 from . import vrp_optimizer_enhanced
+from . import vrp_distance_cache
 from . import vrp_map_view  
 from . import vrp_order  
 from . import res_company  
 from . import res_config_settings
-from . import res_partner
\ No newline at end of file
+from . import res_partner
+from . import fleet_vehicle
\ No newline at end of file
@@ -0,0 +1,114 @@
+# models/fleet_vehicle.py - VÉHICULES ÉLIGIBLES ET DÉPÔTS CHAUFFEURS (CACHE PAR SOCIÉTÉS)
+from odoo import models, api, tools
+import logging
+
+from ..tools import geo
+
+_logger = logging.getLogger(__name__)
+
+# Champs dont la modification change l'ensemble des véhicules éligibles ou leurs dépôts
+VRP_VEHICLE_FIELDS = {'driver_id', 'active', 'company_id'}
+VRP_DRIVER_FIELDS = {'coordinates', 'partner_latitude', 'partner_longitude'}
+# Génération du cache des dépôts, partagée entre les processus via la base
+VRP_DEPOT_SEQUENCE = 'delivery_vrp_depot_cache_seq'
+
+
+class FleetVehicle(models.Model):
+    _inherit = 'fleet.vehicle'
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {VRP_DEPOT_SEQUENCE}")
+
+    @api.model
+    def _get_vrp_vehicles(self):
+        """Véhicules actifs avec chauffeur visibles dans les sociétés autorisées (cache par sociétés)"""
+        return self.browse([vehicle_id for vehicle_id, _coordinates in self._cached_vrp_depots()])
+
+    def _get_vrp_depot_coordinates(self):
+        """Coordonnées du chauffeur (dépôt) de chaque véhicule: {id: (lat, lng) ou None}
+
+        Les véhicules éligibles sont servis depuis le cache; les autres
+        (archivés, sans chauffeur) sont lus en une requête.
+        """
+        depots = dict(self._cached_vrp_depots())
+        others = self.browse([vehicle_id for vehicle_id in self.ids if vehicle_id not in depots])
+        if others:
+            depots.update(others._read_vrp_depots())
+        return {vehicle_id: depots.get(vehicle_id) for vehicle_id in self.ids}
+
+    def _cached_vrp_depots(self):
+        return self._vrp_depots(tuple(sorted(self.env.companies.ids)), self._vrp_depot_generation())
+
+    @api.model
+    def _vrp_depot_generation(self):
+        self.env.cr.execute(f"SELECT last_value FROM {VRP_DEPOT_SEQUENCE}")
+        return self.env.cr.fetchone()[0]
+
+    @tools.ormcache('company_ids', 'generation')
+    def _vrp_depots(self, company_ids, generation):
+        """((id véhicule, (lat, lng) ou None), ...) des véhicules actifs avec chauffeur
+
+        Même recherche que les points d'entrée d'origine: les règles
+        multi-sociétés limitent les véhicules aux sociétés autorisées, d'où
+        la clé company_ids. Valeur immuable partagée entre les requêtes du
+        processus; _clear_vrp_depot_cache change de génération à chaque
+        modification d'un véhicule ou des coordonnées d'un chauffeur, les
+        anciennes entrées sortent du LRU.
+        """
+        vehicles = self.search([
+            ('driver_id', '!=', False),
+            ('active', '=', True),
+        ])
+        return tuple(vehicles.sudo()._read_vrp_depots().items())
+
+    def _read_vrp_depots(self):
+        """Coordonnées des chauffeurs lues en deux requêtes: {id véhicule: (lat, lng) ou None}
+
+        Même priorité que la lecture unitaire: JSON coordinates du chauffeur,
+        puis ses champs latitude/longitude.
+        """
+        driver_by_vehicle = {row['id']: row['driver_id'] for row in self.read(['driver_id'], load=False)}
+        drivers = {
+            row['id']: geo.json_coordinates(row['coordinates'])
+            or geo.valid_coordinates(row['partner_latitude'], row['partner_longitude'])
+            for row in self.env['res.partner'].browse(
+                {driver_id for driver_id in driver_by_vehicle.values() if driver_id}
+            ).read(['coordinates', 'partner_latitude', 'partner_longitude'])
+        }
+        return {vehicle_id: drivers.get(driver_id) for vehicle_id, driver_id in driver_by_vehicle.items()}
+
+    @api.model
+    def _clear_vrp_depot_cache(self):
+        """Invalider uniquement le cache des dépôts, dans tous les processus
+
+        La génération avance tout de suite (lectures de la transaction en
+        cours) puis après le commit, pour qu'un autre processus ayant lu
+        entre-temps les anciennes valeurs ne les garde pas en cache.
+        """
+        self.env.cr.execute(f"SELECT nextval('{VRP_DEPOT_SEQUENCE}')")
+        if not self.env.cr.postcommit.data.get(VRP_DEPOT_SEQUENCE):
+            self.env.cr.postcommit.data[VRP_DEPOT_SEQUENCE] = True
+            registry = self.env.registry
+
+            @self.env.cr.postcommit.add
+            def next_generation():
+                with registry.cursor() as cr:
+                    cr.execute(f"SELECT nextval('{VRP_DEPOT_SEQUENCE}')")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        vehicles = super().create(vals_list)
+        self._clear_vrp_depot_cache()
+        return vehicles
+
+    def write(self, vals):
+        result = super().write(vals)
+        if VRP_VEHICLE_FIELDS.intersection(vals):
+            self._clear_vrp_depot_cache()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self._clear_vrp_depot_cache()
+        return result
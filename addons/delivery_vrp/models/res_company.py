@@ -9,9 +9,26 @@ class ResCompany(models.Model):
         ('osrm', 'OSRM (Gratuit, Recommandé)'),
         ('graphhopper', 'GraphHopper'),
         ('openrouteservice', 'OpenRouteService'),
+        ('local', 'Matrice Locale (hors-ligne)'),
+        ('road_graph', 'Graphe Routier Local (hors-ligne)'),
     ], string='Service de Routage', default='osrm',
        help="Service utilisé pour calculer les distances routières réelles")
     
+    vrp_routing_hedge_service = fields.Selection([
+        ('osrm', 'OSRM'),
+        ('graphhopper', 'GraphHopper'),
+        ('openrouteservice', 'OpenRouteService'),
+        ('local', 'Matrice Locale (hors-ligne)'),
+        ('road_graph', 'Graphe Routier Local (hors-ligne)'),
+    ], string='Service de Routage Secondaire',
+       help="Service interrogé en parallèle si le service principal tarde à répondre; "
+            "la première réponse est retenue")
+    
+    vrp_local_matrix_path = fields.Char(
+        string='Fichier Matrice Locale',
+        help="Chemin d'un fichier .npz (lats, lngs, distances, durations) sur le serveur"
+    )
+    
     vrp_openrouteservice_key = fields.Char(
         string='Clé API OpenRouteService',
         help="Clé API gratuite obtenue sur openrouteservice.org (2000 requêtes/jour)"
@@ -22,6 +39,25 @@ class ResCompany(models.Model):
         help="Clé API GraphHopper (optionnelle pour version gratuite limitée)"
     )
     
+    vrp_road_graph_path = fields.Char(
+        string='Fichier Graphe Routier',
+        help="Chemin d'un extrait routier .npz (node_lats, node_lngs, edge_sources, "
+             "edge_targets, edge_lengths, edge_durations) sur le serveur"
+    )
+    
+    vrp_matrix_mode = fields.Selection([
+        ('dense', 'Matrice Complète'),
+        ('sparse_knn', 'Matrice Creuse (k plus proches voisins)'),
+    ], string='Mode de Matrice', default='dense',
+       help="Matrice creuse: seuls les arcs vers les k plus proches voisins sont calculés "
+            "par la route, les autres sont estimés à vol d'oiseau (grandes tournées)")
+    
+    vrp_matrix_knn = fields.Integer(
+        string='Voisins par Point (k)',
+        default=10,
+        help="Nombre de plus proches voisins calculés par la route en mode matrice creuse"
+    )
+    
     vrp_depot_latitude = fields.Float(
         string='Latitude du Dépôt',
         digits=(10, 6),
@@ -45,3 +81,80 @@ class ResCompany(models.Model):
         default=100,
         help="Nombre maximum d'arrêts par véhicule"
     )
+    
+    vrp_optimization_engine = fields.Selection([
+        ('ortools', 'OR-Tools Multi-Dépôts'),
+        ('proximity', 'Chauffeur le Plus Proche (rapide)'),
+    ], string="Moteur d'Optimisation", default='ortools',
+       help="OR-Tools résout ensemble l'affectation et l'ordre des arrêts, chaque tournée "
+            "partant et revenant au domicile du chauffeur")
+    
+    vrp_optimize_in_background = fields.Boolean(
+        string='Optimisation en Tâche de Fond',
+        default=True,
+        help="Lancer l'optimisation dans une tâche planifiée: l'écran rend la main "
+             "immédiatement et la session d'optimisation indique l'avancement"
+    )
+    
+    vrp_solver_time_limit = fields.Integer(
+        string='Temps de Calcul Max (s)',
+        default=30,
+        help="Durée maximale de recherche OR-Tools (Guided Local Search)"
+    )
+    
+    vrp_solver_plateau_time = fields.Integer(
+        string='Arrêt sans Amélioration (s)',
+        default=10,
+        help="Arrêter la recherche si aucune meilleure solution n'a été trouvée depuis "
+             "ce délai (0 = utiliser tout le temps de calcul)"
+    )
+    
+    vrp_decomposition_mode = fields.Selection([
+        ('none', 'Aucune (résolution globale)'),
+        ('sweep', 'Balayage Angulaire'),
+        ('kmeans', 'K-means Capacitaire'),
+    ], string='Décomposition en Clusters', default='none',
+       help="Au-delà du seuil, les commandes sont partagées en clusters autour des dépôts "
+            "des chauffeurs, chacun résolu séparément (journées multi-villes)")
+    
+    vrp_cluster_max_orders = fields.Integer(
+        string='Commandes Max par Cluster',
+        default=250,
+        help="Taille maximale d'un cluster; la décomposition n'est utilisée qu'au-delà"
+    )
+    
+    vrp_parallel_clusters = fields.Boolean(
+        string='Clusters en Parallèle',
+        default=False,
+        help="Résoudre les clusters dans des processus séparés. Sans effet en mode threadé "
+             "(serveur sans --workers, cas du serveur de développement) ni quand un autre "
+             "thread est actif dans le processus: les clusters y sont toujours résolus l'un "
+             "après l'autre. Utile seulement sur un serveur multi-processus (--workers > 0)"
+    )
+    
+    vrp_warm_start = fields.Boolean(
+        string='Démarrage à Chaud',
+        default=True,
+        help="Partir des tournées de la dernière session couvrant au moins la moitié "
+             "des commandes au lieu de reconstruire une solution à chaque optimisation"
+    )
+    
+    vrp_debug_logging = fields.Boolean(
+        string='Journal Détaillé',
+        default=False,
+        help="Journaliser chaque commande et chaque tournée pendant l'optimisation et la "
+             "préparation de la carte (diagnostic; ralentit les grandes journées)"
+    )
+    
+    vrp_distance_cache_ttl_days = fields.Integer(
+        string='Durée de Validité du Cache (jours)',
+        default=30,
+        help="Durée pendant laquelle une distance routière en cache est réutilisée"
+    )
+    
+    vrp_distance_cache_max_entries = fields.Integer(
+        string='Taille Max du Cache (paires)',
+        default=500000,
+        help="Nombre maximum de paires conservées, les plus anciennes sont supprimées au-delà "
+             "lors du nettoyage quotidien"
+    )
@@ -9,6 +9,31 @@ class ResConfigSettings(models.TransientModel):
         readonly=False
     )
     
+    vrp_routing_hedge_service = fields.Selection(
+        related='company_id.vrp_routing_hedge_service',
+        readonly=False
+    )
+    
+    vrp_local_matrix_path = fields.Char(
+        related='company_id.vrp_local_matrix_path',
+        readonly=False
+    )
+    
+    vrp_road_graph_path = fields.Char(
+        related='company_id.vrp_road_graph_path',
+        readonly=False
+    )
+    
+    vrp_matrix_mode = fields.Selection(
+        related='company_id.vrp_matrix_mode',
+        readonly=False
+    )
+    
+    vrp_matrix_knn = fields.Integer(
+        related='company_id.vrp_matrix_knn',
+        readonly=False
+    )
+    
     vrp_openrouteservice_key = fields.Char(
         related='company_id.vrp_openrouteservice_key',
         readonly=False
@@ -39,6 +64,61 @@ class ResConfigSettings(models.TransientModel):
         readonly=False
     )
     
+    vrp_optimization_engine = fields.Selection(
+        related='company_id.vrp_optimization_engine',
+        readonly=False
+    )
+    
+    vrp_optimize_in_background = fields.Boolean(
+        related='company_id.vrp_optimize_in_background',
+        readonly=False
+    )
+    
+    vrp_solver_time_limit = fields.Integer(
+        related='company_id.vrp_solver_time_limit',
+        readonly=False
+    )
+    
+    vrp_solver_plateau_time = fields.Integer(
+        related='company_id.vrp_solver_plateau_time',
+        readonly=False
+    )
+    
+    vrp_decomposition_mode = fields.Selection(
+        related='company_id.vrp_decomposition_mode',
+        readonly=False
+    )
+    
+    vrp_cluster_max_orders = fields.Integer(
+        related='company_id.vrp_cluster_max_orders',
+        readonly=False
+    )
+    
+    vrp_parallel_clusters = fields.Boolean(
+        related='company_id.vrp_parallel_clusters',
+        readonly=False
+    )
+    
+    vrp_warm_start = fields.Boolean(
+        related='company_id.vrp_warm_start',
+        readonly=False
+    )
+    
+    vrp_debug_logging = fields.Boolean(
+        related='company_id.vrp_debug_logging',
+        readonly=False
+    )
+    
+    vrp_distance_cache_ttl_days = fields.Integer(
+        related='company_id.vrp_distance_cache_ttl_days',
+        readonly=False
+    )
+    
+    vrp_distance_cache_max_entries = fields.Integer(
+        related='company_id.vrp_distance_cache_max_entries',
+        readonly=False
+    )
+    
     @api.onchange('vrp_depot_latitude', 'vrp_depot_longitude')
     def _onchange_depot_coordinates(self):
         """Validation des coordonnées du dépôt"""
@@ -81,7 +161,7 @@ class ResConfigSettings(models.TransientModel):
         
         try:
             matrix = optimizer.create_road_distance_matrix(test_locations)
-            if matrix and len(matrix) == 2:
+            if matrix is not None and len(matrix) == 2:
                 distance_km = matrix[0][1] / 1000
                 return {
                     'type': 'ir.actions.client',
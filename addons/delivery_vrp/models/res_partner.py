@@ -1,7 +1,12 @@
 # models/res_partner.py 
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+from odoo.osv import expression
 import json
 import logging
+import numpy as np
+
+from ..tools import geo
+from .fleet_vehicle import VRP_DRIVER_FIELDS
 
 _logger = logging.getLogger(__name__)
 
@@ -14,11 +19,35 @@ class ResPartner(models.Model):
     # Champs calculés pour faciliter l'accès
     partner_latitude = fields.Float(string='Latitude', compute='_compute_gps_fields', store=True)
     partner_longitude = fields.Float(string='Longitude', compute='_compute_gps_fields', store=True)
+    vrp_geohash = fields.Char(
+        string='Geohash', compute='_compute_gps_fields', store=True,
+        help="Cellule geohash des coordonnées (recherche par préfixe: =like 'evfw%')"
+    )
+    
+    # Taille des lots du rattrapage des colonnes géographiques
+    GEO_BACKFILL_BATCH = 1000
+    
+    def _auto_init(self):
+        result = super()._auto_init()
+        # Index composite pour les rectangles englobants (partenaires géolocalisés uniquement)
+        tools.create_index(
+            self._cr, 'res_partner_vrp_lat_lng_index', self._table,
+            ['partner_latitude', 'partner_longitude'],
+            where='partner_latitude != 0 AND partner_longitude != 0'
+        )
+        # Recherche par préfixe (LIKE 'abc%') indépendante de la collation
+        tools.create_index(
+            self._cr, 'res_partner_vrp_geohash_index', self._table,
+            ['vrp_geohash text_pattern_ops'], where='vrp_geohash IS NOT NULL'
+        )
+        return result
     
     @api.depends('coordinates')
     def _compute_gps_fields(self):
         """Calculer les champs latitude/longitude depuis le JSON coordinates"""
         for partner in self:
+            valid = geo.json_coordinates(partner.coordinates)
+            partner.vrp_geohash = geo.geohash(*valid) if valid else False
             if partner.coordinates and isinstance(partner.coordinates, dict):
                 try:
                     lat = float(partner.coordinates.get('latitude', 0.0))
@@ -38,6 +67,55 @@ class ResPartner(models.Model):
                 partner.partner_latitude = 0.0
                 partner.partner_longitude = 0.0
     
+    @api.model
+    def _vrp_backfill_geo_columns(self):
+        """Recalculer latitude, longitude et geohash des partenaires ayant des coordonnées
+
+        Par lots de GEO_BACKFILL_BATCH, pour les partenaires existants ou dont
+        le JSON a été écrit hors ORM (imports SQL).
+        """
+        partner_ids = self.with_context(active_test=False).search([('coordinates', '!=', False)]).ids
+        for start in range(0, len(partner_ids), self.GEO_BACKFILL_BATCH):
+            partners = self.browse(partner_ids[start:start + self.GEO_BACKFILL_BATCH])
+            for field_name in ('partner_latitude', 'partner_longitude', 'vrp_geohash'):
+                self.env.add_to_compute(self._fields[field_name], partners)
+            partners.flush_recordset()
+            self.env.invalidate_all()
+        _logger.info(f"Colonnes géographiques recalculées pour {len(partner_ids)} partenaires")
+    
+    @api.model
+    def _search_within_bbox(self, min_lat, min_lng, max_lat, max_lng, domain=None):
+        """Partenaires géolocalisés dans un rectangle (degrés), filtrés en SQL sur l'index lat/lng"""
+        return self.search(expression.AND([domain or [], [
+            ('partner_latitude', '>=', min_lat), ('partner_latitude', '<=', max_lat),
+            ('partner_longitude', '>=', min_lng), ('partner_longitude', '<=', max_lng),
+            ('partner_latitude', '!=', 0.0), ('partner_longitude', '!=', 0.0),
+        ]]))
+    
+    @api.model
+    def _search_within_radius(self, lat, lng, radius_m, domain=None):
+        """Partenaires à moins de radius_m mètres (vol d'oiseau), du plus proche au plus éloigné
+
+        Le rectangle englobant le cercle est sélectionné en SQL; la distance
+        haversine exacte n'est calculée que pour ces candidats.
+        """
+        candidates = self._search_within_bbox(*geo.bounding_box(lat, lng, radius_m), domain=domain)
+        if not candidates:
+            return candidates
+        rows = candidates.read(['partner_latitude', 'partner_longitude'])
+        distances = geo.haversine_block(
+            [lat], [lng], [row['partner_latitude'] for row in rows], [row['partner_longitude'] for row in rows]
+        )[0]
+        closest = np.argsort(distances, kind='stable')
+        return self.browse([rows[index]['id'] for index in closest if distances[index] <= radius_m])
+    
+    def write(self, vals):
+        result = super().write(vals)
+        # Dépôts des véhicules en cache: nouvelle génération si une position change
+        if VRP_DRIVER_FIELDS.intersection(vals):
+            self.env['fleet.vehicle']._clear_vrp_depot_cache()
+        return result
+    
     def set_coordinates(self, latitude, longitude):
         """Méthode helper pour définir les coordonnées"""
         if isinstance(latitude, (int, float)) and isinstance(longitude, (int, float)):
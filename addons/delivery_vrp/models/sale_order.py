@@ -2,6 +2,10 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError
 import logging
+import numpy as np
+
+from ..tools import geo
+from ..tools import profiling
 
 _logger = logging.getLogger(__name__)
 
@@ -31,32 +35,16 @@ class SaleOrder(models.Model):
     return {'latitude': 34.0209, 'longitude': -6.8416}
 
  def _get_driver_coordinates_for_vehicle(self, vehicle):
-    """NOUVEAU: Récupérer les coordonnées d'un chauffeur de véhicule"""
+    """NOUVEAU: Récupérer les coordonnées d'un chauffeur de véhicule (cache fleet.vehicle)"""
     if not vehicle or not vehicle.driver_id:
         _logger.warning(f"Véhicule {vehicle.name if vehicle else 'None'} sans chauffeur")
         return None, None, False
     
-    driver = vehicle.driver_id
+    coordinates = vehicle._get_vrp_depot_coordinates()[vehicle.id]
+    if coordinates:
+        return coordinates[0], coordinates[1], True
     
-    # 1. Essayer les coordonnées JSON du chauffeur
-    if driver.coordinates and isinstance(driver.coordinates, dict):
-        try:
-            lat = float(driver.coordinates.get('latitude', 0.0))
-            lng = float(driver.coordinates.get('longitude', 0.0))
-            
-            if -90 <= lat <= 90 and -180 <= lng <= 180 and (lat != 0.0 and lng != 0.0):
-                _logger.info(f"✓ Coordonnées chauffeur {driver.name}: {lat}, {lng}")
-                return lat, lng, True
-        except (ValueError, TypeError):
-            pass
-    
-    # 2. Essayer les champs directs
-    if hasattr(driver, 'partner_latitude') and hasattr(driver, 'partner_longitude'):
-        if driver.partner_latitude and driver.partner_longitude:
-            if (driver.partner_latitude != 0.0 and driver.partner_longitude != 0.0):
-                return driver.partner_latitude, driver.partner_longitude, True
-    
-    _logger.warning(f"✗ Aucune coordonnée pour chauffeur {driver.name}")
+    _logger.warning(f"✗ Aucune coordonnée pour chauffeur {vehicle.driver_id.name}")
     return None, None, False
 
  def action_optimize_delivery_enhanced(self):
@@ -67,11 +55,10 @@ class SaleOrder(models.Model):
         raise UserError("Veuillez sélectionner au moins une commande")
     
     # Vérifier les coordonnées des commandes
-    orders_without_coords = []
-    for order in selected_orders:
-        lat, lng, coords_found = self._get_order_coordinates_unified(order)
-        if not coords_found:
-            orders_without_coords.append(order)
+    _lats, _lngs, missing = selected_orders._resolve_coordinates()
+    orders_without_coords = selected_orders.browse([
+        order_id for order_id, is_missing in zip(selected_orders.ids, missing) if is_missing
+    ])
     
     if orders_without_coords:
         raise UserError(
@@ -80,19 +67,16 @@ class SaleOrder(models.Model):
         )
     
     # Récupérer les véhicules avec chauffeurs géolocalisés
-    vehicles = self.env['fleet.vehicle'].search([
-        ('driver_id', '!=', False),
-        ('active', '=', True)
-    ])
+    vehicles = self.env['fleet.vehicle']._get_vrp_vehicles()
     
     if not vehicles:
         raise UserError("Aucun véhicule avec chauffeur disponible")
     
     # Vérifier que les chauffeurs ont des coordonnées
     valid_vehicles = []
+    depots = vehicles._get_vrp_depot_coordinates()
     for vehicle in vehicles:
-        lat, lng, coords_found = self._get_driver_coordinates_for_vehicle(vehicle)
-        if coords_found:
+        if depots[vehicle.id]:
             valid_vehicles.append(vehicle)
         else:
             _logger.warning(f"Véhicule {vehicle.name} ignoré - chauffeur sans coordonnées")
@@ -135,14 +119,21 @@ class SaleOrder(models.Model):
     vehicles = optimized_orders.mapped('assigned_vehicle_id')
     _logger.info(f"Véhicules trouvés: {[v.name for v in vehicles]}")
     
+    # Coordonnées de toutes les commandes optimisées, résolues en une fois
+    order_coordinates = optimized_orders._resolve_coordinates()
+    order_positions = {order_id: index for index, order_id in enumerate(optimized_orders.ids)}
+    depots = vehicles._get_vrp_depot_coordinates()
+    # Détail par véhicule et par commande: journal détaillé société uniquement
+    verbose = profiling.verbose()
+    
     for vehicle in vehicles:
         if not vehicle:
             continue
         
         # Récupérer les coordonnées du chauffeur (nouveau dépôt)
-        driver_lat, driver_lng, driver_coords_found = self._get_driver_coordinates_for_vehicle(vehicle)
+        driver_lat, driver_lng = depots[vehicle.id] or (None, None)
         
-        if not driver_coords_found:
+        if not depots[vehicle.id]:
             _logger.warning(f"❌ Véhicule {vehicle.name} ignoré - pas de coordonnées chauffeur")
             continue
         
@@ -150,9 +141,10 @@ class SaleOrder(models.Model):
         vehicle_orders = optimized_orders.filtered(lambda o: o.assigned_vehicle_id == vehicle)
         vehicle_orders = vehicle_orders.sorted(lambda x: x.delivery_sequence or 0)
         
-        _logger.info(f"=== VÉHICULE {vehicle.name} ===")
-        _logger.info(f"Coordonnées chauffeur: {driver_lat}, {driver_lng}")
-        _logger.info(f"Commandes triées: {[(o.name, o.delivery_sequence) for o in vehicle_orders]}")
+        if verbose:
+            _logger.info(f"=== VÉHICULE {vehicle.name} ===")
+            _logger.info(f"Coordonnées chauffeur: {driver_lat}, {driver_lng}")
+            _logger.info(f"Commandes triées: {[(o.name, o.delivery_sequence) for o in vehicle_orders]}")
         
         waypoints = []
         
@@ -168,12 +160,15 @@ class SaleOrder(models.Model):
             'vehicle_name': vehicle.name
         }
         waypoints.append(driver_waypoint)
-        _logger.info(f"  ✅ Dépôt chauffeur ajouté: {driver_lat}, {driver_lng}")
+        if verbose:
+            _logger.info(f"  ✅ Dépôt chauffeur ajouté: {driver_lat}, {driver_lng}")
         
         # 2. Clients dans l'ordre de livraison
         clients_added = 0
+        order_lats, order_lngs, missing = order_coordinates
         for order in vehicle_orders:
-            lat, lng, coords_found = self._get_order_coordinates_unified(order)
+            index = order_positions[order.id]
+            lat, lng, coords_found = order_lats[index], order_lngs[index], not missing[index]
             
             if coords_found:
                 waypoint = {
@@ -187,7 +182,8 @@ class SaleOrder(models.Model):
                 }
                 waypoints.append(waypoint)
                 clients_added += 1
-                _logger.info(f"  ✅ Client: {order.name} - Séq: {order.delivery_sequence}")
+                if verbose:
+                    _logger.info(f"  ✅ Client: {order.name} - Séq: {order.delivery_sequence}")
             else:
                 _logger.warning(f"  ❌ Coordonnées manquantes: {order.name}")
         
@@ -203,7 +199,8 @@ class SaleOrder(models.Model):
                 'driver_name': vehicle.driver_id.name
             }
             waypoints.append(driver_return)
-            _logger.info(f"  ✅ Retour chauffeur ajouté")
+            if verbose:
+                _logger.info(f"  ✅ Retour chauffeur ajouté")
             
             # Données véhicule pour la carte
             vehicle_data = {
@@ -222,7 +219,8 @@ class SaleOrder(models.Model):
             }
             vehicles_data.append(vehicle_data)
             
-            _logger.info(f"✅ {vehicle.name} - {len(waypoints)} waypoints, dépôt: chauffeur")
+            if verbose:
+                _logger.info(f"✅ {vehicle.name} - {len(waypoints)} waypoints, dépôt: chauffeur")
         else:
             _logger.warning(f"❌ Véhicule {vehicle.name} ignoré - aucun client valide")
     
@@ -231,6 +229,7 @@ class SaleOrder(models.Model):
     
     return vehicles_data
 
+ @profiling.profiled
  def action_show_map(self):
     """MODIFIÉ: Affichage carte avec nouvelles données chauffeur"""
     selected_orders = self.browse(self.env.context.get('active_ids', []))
@@ -250,7 +249,8 @@ class SaleOrder(models.Model):
         )
     
     # Préparer les données avec dépôts chauffeurs
-    vehicles_data = self._prepare_map_data_corrected(selected_orders)
+    with profiling.span('map_data', orders=len(optimized_orders)):
+        vehicles_data = self._prepare_map_data_corrected(selected_orders)
     
     _logger.info(f"Données préparées: {len(vehicles_data)} véhicules")
     
@@ -269,7 +269,8 @@ class SaleOrder(models.Model):
         
         if waypoints and len(waypoints) > 1 and driver_coords:
             valid_vehicles.append(vehicle_data)
-            _logger.info(f"✅ {vehicle_data['vehicle_name']} valide - {len(waypoints)} waypoints")
+            if profiling.verbose():
+                _logger.info(f"✅ {vehicle_data['vehicle_name']} valide - {len(waypoints)} waypoints")
         else:
             _logger.warning(f"❌ {vehicle_data.get('vehicle_name', 'Unknown')} ignoré")
     
@@ -290,9 +291,10 @@ class SaleOrder(models.Model):
     
     # Créer l'enregistrement map view
     try:
-        map_view = self.env['vrp.map.view'].create({
-            'vehicles_data': vehicles_json
-        })
+        with profiling.span('map', vehicles=len(valid_vehicles)):
+            map_view = self.env['vrp.map.view'].create({
+                'vehicles_data': vehicles_json
+            })
         _logger.info(f"✅ Map View créé avec dépôts chauffeurs: ID {map_view.id}")
     except Exception as e:
         _logger.error(f"❌ ERREUR CRÉATION MAP VIEW: {e}")
@@ -314,17 +316,16 @@ class SaleOrder(models.Model):
 
  def action_test_driver_coordinates(self):
     """NOUVEAU: Tester les coordonnées des chauffeurs"""
-    vehicles = self.env['fleet.vehicle'].search([
-        ('driver_id', '!=', False),
-        ('active', '=', True)
-    ])
+    vehicles = self.env['fleet.vehicle']._get_vrp_vehicles()
     
     if not vehicles:
         raise UserError("Aucun véhicule avec chauffeur trouvé")
     
     results = []
+    depots = vehicles._get_vrp_depot_coordinates()
     for vehicle in vehicles:
-        driver_lat, driver_lng, coords_found = self._get_driver_coordinates_for_vehicle(vehicle)
+        driver_lat, driver_lng = depots[vehicle.id] or (None, None)
+        coords_found = bool(depots[vehicle.id])
         
         results.append({
             'vehicle': vehicle.name,
@@ -369,144 +370,123 @@ class SaleOrder(models.Model):
 
  def _get_order_coordinates_unified(self, order):
         """Méthode unifiée pour récupérer les coordonnées d'une commande"""
-        lat, lng = 0.0, 0.0
-        coords_found = False
-        
-        _logger.info(f"Récupération coordonnées pour commande {order.name}")
-        
-        # 1. Essayer les coordonnées JSON du partenaire
-        partner = order.partner_id
-        if partner.coordinates and isinstance(partner.coordinates, dict):
-            try:
-                lat = float(partner.coordinates.get('latitude', 0.0))
-                lng = float(partner.coordinates.get('longitude', 0.0))
-                
-                if -90 <= lat <= 90 and -180 <= lng <= 180 and (lat != 0.0 and lng != 0.0):
-                    coords_found = True
-                    _logger.info(f"✓ Coordonnées trouvées via JSON partner: {lat}, {lng}")
-            except (ValueError, TypeError) as e:
-                _logger.warning(f"Erreur parsing JSON coordinates: {e}")
-        
-        # 2. Si pas trouvé, essayer via VRP order
-        if not coords_found:
-            vrp_order = self.env['vrp.order'].search([
-                ('sale_order_id', '=', order.id)
-            ], limit=1)
-            
-            if vrp_order:
-                vrp_order._compute_coordinates()
-                if vrp_order.partner_latitude and vrp_order.partner_longitude:
-                    if (vrp_order.partner_latitude != 0.0 and vrp_order.partner_longitude != 0.0):
-                        lat = vrp_order.partner_latitude
-                        lng = vrp_order.partner_longitude
-                        coords_found = True
-                        _logger.info(f"✓ Coordonnées trouvées via VRP order: {lat}, {lng}")
-        
-        # 3. Si encore pas trouvé, essayer les champs directs
-        if not coords_found and hasattr(order, 'partner_latitude') and hasattr(order, 'partner_longitude'):
-            if order.partner_latitude and order.partner_longitude:
-                if (order.partner_latitude != 0.0 and order.partner_longitude != 0.0):
-                    lat = order.partner_latitude
-                    lng = order.partner_longitude
-                    coords_found = True
-                    _logger.info(f"✓ Coordonnées trouvées via champs directs: {lat}, {lng}")
-        
-        if not coords_found:
-            _logger.warning(f"✗ Aucune coordonnée valide trouvée pour {order.name}")
-        
-        return lat, lng, coords_found
+        lats, lngs, missing = order._resolve_coordinates()
+        if missing[0]:
+            return 0.0, 0.0, False
+        return float(lats[0]), float(lngs[0]), True
 
-   
+ def _resolve_coordinates(self):
+        """Coordonnées de toutes les commandes de self en un nombre constant de requêtes
+
+        Même ordre de priorité que la recherche unitaire: JSON coordinates du
+        partenaire, puis coordonnées stockées du VRP order lié, puis champs
+        latitude/longitude du partenaire. Une coordonnée est valide si elle
+        est dans les bornes et non nulle.
+
+        Retourne (latitudes, longitudes, manquantes), tableaux numpy alignés
+        sur self; manquantes est le masque des commandes sans coordonnées.
+        """
+        size = len(self)
+        lats = np.zeros(size)
+        lngs = np.zeros(size)
+        missing = np.ones(size, dtype=bool)
+        if not size:
+            return lats, lngs, missing
+
+        with profiling.span('coordinates', orders=size):
+            # 1. JSON coordinates des partenaires, lus en une fois
+            partner_by_order = {row['id']: row['partner_id'] for row in self.read(['partner_id'], load=False)}
+            partner_rows = {
+                row['id']: row for row in self.env['res.partner'].browse(
+                    {partner_id for partner_id in partner_by_order.values() if partner_id}
+                ).read(['coordinates', 'partner_latitude', 'partner_longitude'])
+            }
+
+            json_coordinates = {partner_id: geo.json_coordinates(row['coordinates']) for partner_id, row in partner_rows.items()}
+            field_coordinates = {
+                partner_id: geo.valid_coordinates(row['partner_latitude'], row['partner_longitude'])
+                for partner_id, row in partner_rows.items()
+            }
+
+            for index, order_id in enumerate(self.ids):
+                found = json_coordinates.get(partner_by_order[order_id])
+                if found:
+                    lats[index], lngs[index] = found
+                    missing[index] = False
+
+            # 2. Coordonnées stockées des VRP orders liés, 3. champs du partenaire
+            if missing.any():
+                remaining = np.flatnonzero(missing)
+                vrp_coordinates = {}
+                for row in self.env['vrp.order'].search_read(
+                    [('sale_order_id', 'in', [self.ids[index] for index in remaining])],
+                    ['sale_order_id', 'partner_latitude', 'partner_longitude'], load=False
+                ):
+                    vrp_coordinates.setdefault(
+                        row['sale_order_id'], geo.valid_coordinates(row['partner_latitude'], row['partner_longitude'])
+                    )
+                for index in remaining:
+                    order_id = self.ids[index]
+                    found = vrp_coordinates.get(order_id) or field_coordinates.get(partner_by_order[order_id])
+                    if found:
+                        lats[index], lngs[index] = found
+                        missing[index] = False
+
+        if missing.any():
+            _logger.warning(f"✗ {int(missing.sum())} commandes sans coordonnées valides sur {size}")
+        return lats, lngs, missing
 
  def _apply_optimization_results_enhanced(self, orders, optimization_result, vehicles):
-     """Application des résultats d'optimisation améliorée avec debugging complet"""
+     """Application des résultats d'optimisation améliorée en écriture groupée"""
     
      _logger.info("=== APPLICATION RÉSULTATS OPTIMISATION ===")
      _logger.info(f"Commandes à traiter: {len(orders)}")
-     _logger.info(f"Véhicules disponibles: {[v.name for v in vehicles]}")
-    
-    # Reset des affectations précédentes
-     reset_count = orders.write({
-        'assigned_vehicle_id': False,
-        'delivery_sequence': 0
-     })
-     _logger.info(f"Reset effectué sur {len(orders)} commandes")
     
      routes = optimization_result.get('routes', {})
      stats = optimization_result.get('stats', {})
-     vehicle_dict = {v.id: v for v in vehicles}
+     vehicle_names = {vehicle.id: vehicle.name for vehicle in vehicles}
     
      _logger.info(f"Routes à appliquer: {len(routes)} véhicules")
     
+    # Reset des affectations précédentes (indicateur manuel inchangé), puis tournées calculées (affectations automatiques)
+     values_by_order = {
+        order_id: {'assigned_vehicle_id': False, 'delivery_sequence': 0, 'manual_assignment': None}
+        for order_id in orders.ids
+     }
      total_applied = 0
      for vehicle_id, order_ids in routes.items():
-        if vehicle_id not in vehicle_dict:
+        if vehicle_id not in vehicle_names:
             _logger.warning(f"❌ Véhicule {vehicle_id} non trouvé dans la liste disponible")
             continue
         
-        vehicle = vehicle_dict[vehicle_id]
-        _logger.info(f"\n--- APPLICATION VÉHICULE {vehicle.name} (ID: {vehicle_id}) ---")
-        _logger.info(f"Commandes à assigner: {len(order_ids)}")
-        
         orders_applied_for_vehicle = 0
         for sequence, order_id in enumerate(order_ids, start=1):  # Commencer à 1 pour la séquence
-            # Trouver la commande dans notre liste
-            order = orders.filtered(lambda o: o.id == order_id)
-            
-            if order:
-                # Appliquer l'assignation
-                try:
-                    order.write({
-                        'assigned_vehicle_id': vehicle_id,
-                        'delivery_sequence': sequence,
-                        'manual_assignment': False  # Marquer comme assignation automatique
-                    })
-                    orders_applied_for_vehicle += 1
-                    total_applied += 1
-                    _logger.info(f"  ✅ Commande {order.name} (ID: {order.id}): séquence {sequence}")
-                    
-                except Exception as e:
-                    _logger.error(f"  ❌ Erreur assignation commande {order_id}: {e}")
+            if order_id in values_by_order:
+                values_by_order[order_id].update({
+                    'assigned_vehicle_id': vehicle_id, 'delivery_sequence': sequence, 'manual_assignment': False,
+                })
+                orders_applied_for_vehicle += 1
             else:
                 _logger.warning(f"  ⚠️  Commande {order_id} non trouvée dans la liste d'entrée")
+        total_applied += orders_applied_for_vehicle
         
-        # Vérification des stats pour ce véhicule
         vehicle_stats = stats.get(vehicle_id, {})
-        if vehicle_stats:
-            distance_km = vehicle_stats.get('distance', 0) / 1000
-            stops = vehicle_stats.get('stops', 0)
-            _logger.info(f"  📊 Stats véhicule: {stops} arrêts, {distance_km:.2f}km")
-        
-        _logger.info(f"  ✅ {vehicle.name}: {orders_applied_for_vehicle}/{len(order_ids)} commandes appliquées")
-    
-    # Vérification finale
-     _logger.info(f"\n=== VÉRIFICATION FINALE APPLICATION ===")
-     _logger.info(f"Total commandes appliquées: {total_applied}")
-    
-    # Vérifier que toutes les commandes ont bien été assignées
-     assigned_orders = orders.filtered('assigned_vehicle_id')
-     unassigned_orders = orders.filtered(lambda o: not o.assigned_vehicle_id)
-    
-     _logger.info(f"Commandes assignées après application: {len(assigned_orders)}")
-     _logger.info(f"Commandes non assignées: {len(unassigned_orders)}")
+        _logger.info(
+            f"  ✅ {vehicle_names[vehicle_id]}: {orders_applied_for_vehicle}/{len(order_ids)} commandes, "
+            f"{vehicle_stats.get('stops', 0)} arrêts, {vehicle_stats.get('distance', 0) / 1000:.2f}km"
+        )
     
-     if unassigned_orders:
-        _logger.warning("❌ COMMANDES NON ASSIGNÉES:")
-        for order in unassigned_orders:
-            _logger.warning(f"  - {order.name} (ID: {order.id})")
+     self._bulk_write_assignments(values_by_order)
     
-    # Log détaillé des assignations finales
-     for vehicle in assigned_orders.mapped('assigned_vehicle_id'):
-        vehicle_orders = assigned_orders.filtered(lambda o: o.assigned_vehicle_id == vehicle)
-        vehicle_orders = vehicle_orders.sorted('delivery_sequence')
-        _logger.info(f"\n{vehicle.name} - Assignations finales:")
-        for order in vehicle_orders:
-            _logger.info(f"  Seq {order.delivery_sequence}: {order.name} (ID: {order.id})")
+     unassigned_ids = [order_id for order_id, values in values_by_order.items() if not values['assigned_vehicle_id']]
+     _logger.info(f"Total commandes appliquées: {total_applied}, non assignées: {len(unassigned_ids)}")
+     if unassigned_ids:
+        _logger.warning(f"❌ COMMANDES NON ASSIGNÉES: {unassigned_ids}")
     
      return {
         'total_applied': total_applied,
-        'assigned_count': len(assigned_orders),
-        'unassigned_count': len(unassigned_orders)
+        'assigned_count': len(values_by_order) - len(unassigned_ids),
+        'unassigned_count': len(unassigned_ids)
      }
 
  def _reload_view_with_grouping(self):
@@ -597,16 +577,13 @@ class SaleOrder(models.Model):
     
     # ÉTAPE 1: Vérifier les coordonnées
      _logger.info("\n--- ÉTAPE 1: VÉRIFICATION COORDONNÉES ---")
-     for order in selected_orders:
-        lat, lng, coords_found = self._get_order_coordinates_unified(order)
-        _logger.info(f"Commande {order.name}: coords_found={coords_found}, lat={lat}, lng={lng}")
+     lats, lngs, missing = selected_orders._resolve_coordinates()
+     for order, lat, lng, is_missing in zip(selected_orders, lats, lngs, missing):
+        _logger.info(f"Commande {order.name}: coords_found={not is_missing}, lat={lat}, lng={lng}")
     
     # ÉTAPE 2: Vérifier les véhicules
      _logger.info("\n--- ÉTAPE 2: VÉRIFICATION VÉHICULES ---")
-     vehicles = self.env['fleet.vehicle'].search([
-        ('driver_id', '!=', False),
-        ('active', '=', True)
-     ])
+     vehicles = self.env['fleet.vehicle']._get_vrp_vehicles()
      _logger.info(f"Véhicules trouvés: {len(vehicles)}")
      for vehicle in vehicles:
         _logger.info(f"  - {vehicle.name} (ID: {vehicle.id}) - Chauffeur: {vehicle.driver_id.name}")
@@ -759,10 +736,7 @@ class SaleOrder(models.Model):
 
  def action_setup_driver_coordinates(self):
     """NOUVEAU: Configurer les coordonnées GPS des chauffeurs"""
-    vehicles = self.env['fleet.vehicle'].search([
-        ('driver_id', '!=', False),
-        ('active', '=', True)
-    ])
+    vehicles = self.env['fleet.vehicle']._get_vrp_vehicles()
     
     if not vehicles:
         raise UserError("Aucun véhicule avec chauffeur trouvé")
@@ -782,10 +756,11 @@ class SaleOrder(models.Model):
     ]
     
     drivers_updated = 0
+    depots = vehicles._get_vrp_depot_coordinates()
     for i, vehicle in enumerate(vehicles):
         if vehicle.driver_id:
             # Vérifier si le chauffeur a déjà des coordonnées
-            existing_lat, existing_lng, has_coords = self._get_driver_coordinates_for_vehicle(vehicle)
+            has_coords = bool(depots[vehicle.id])
             
             if not has_coords:
                 # Assigner des coordonnées de test
@@ -824,10 +799,7 @@ class SaleOrder(models.Model):
 
  def action_validate_driver_system(self):
     """NOUVEAU: Valider que le système dépôts chauffeurs est prêt"""
-    vehicles = self.env['fleet.vehicle'].search([
-        ('driver_id', '!=', False),
-        ('active', '=', True)
-    ])
+    vehicles = self.env['fleet.vehicle']._get_vrp_vehicles()
     
     if not vehicles:
         raise UserError("Aucun véhicule avec chauffeur configuré")
@@ -839,10 +811,9 @@ class SaleOrder(models.Model):
         'ready_for_optimization': False
     }
     
+    depots = vehicles._get_vrp_depot_coordinates()
     for vehicle in vehicles:
-        lat, lng, coords_found = self._get_driver_coordinates_for_vehicle(vehicle)
-        
-        if coords_found:
+        if depots[vehicle.id]:
             validation_results['valid_drivers'] += 1
         else:
             validation_results['invalid_drivers'].append({
@@ -1,10 +1,18 @@
 # models/sale_order_enhanced.py - VERSION CORRIGÉE
-from odoo import models, fields, api
+from odoo import models, fields, api, SUPERUSER_ID
 from odoo.exceptions import UserError, ValidationError
+from datetime import timedelta
+from psycopg2.extras import execute_values
 import logging
+import time
+
+from ..tools import profiling
 
 _logger = logging.getLogger(__name__)
 
+# Dernier événement de progression publié par session: (étape, instant)
+_progress_sent = {}
+
 class SaleOrderEnhanced(models.Model):
     _inherit = 'sale.order'
     
@@ -17,7 +25,7 @@ class SaleOrderEnhanced(models.Model):
     
     estimated_delivery_time = fields.Float(
         string='Temps de Livraison Estimé (min)',
-        help="Temps estimé pour cette livraison basé sur la distance routière"
+        help="Temps de trajet cumulé depuis le départ du chauffeur jusqu'à cette livraison"
     )
     
     road_distance_to_depot = fields.Float(
@@ -71,108 +79,213 @@ class SaleOrderEnhanced(models.Model):
 
         _logger.info(f"Processing {len(selected_orders)} valid orders for optimization")
 
-        # Forcer le recalcul des coordonnées avant validation  
-        self._ensure_coordinates_computed(selected_orders)  
-        
-        # Validation préalable
-        self._validate_orders_for_optimization(selected_orders)
-        
-        # Créer une session d'optimisation
-        optimization_session = self._create_optimization_session(selected_orders)
-        
-        # Lancer l'optimisation avec l'algorithme amélioré
-        try:
-            result = self._run_enhanced_optimization(selected_orders, optimization_session)
+        with profiling.profile(self.env.cr, verbose=self.env.company.vrp_debug_logging) as profile:
+            # Validation préalable
+            with profiling.span('validate', orders=len(selected_orders)):
+                self._validate_orders_for_optimization(selected_orders)
             
-            if result:
-                # Appliquer les résultats
-                self._apply_enhanced_results(selected_orders, result, optimization_session)
-                
-                # Notification de succès simple
-                total_distance_km = result['total_distance'] / 1000
-                vehicles_used = len(result['routes'])
-                total_stops = result['total_stops']
-                
-                return {
-                    'type': 'ir.actions.client',
-                    'tag': 'display_notification',
-                    'params': {
-                        'title': 'Optimisation VRP Terminée',
-                        'message': f'Optimisation réussie: {total_distance_km:.1f} km, {vehicles_used} véhicules, {total_stops} arrêts',
-                        'type': 'success',
-                        'sticky': True,
-                    }
-                }
-            else:
-                raise UserError("Impossible de trouver une solution optimale")
-                
-        except Exception as e:
-            _logger.error(f"Optimization failed: {str(e)}")
-            optimization_session.write({'status': 'failed', 'error_message': str(e)})
-            raise UserError(f"Erreur d'optimisation: {str(e)}")
-
-    def _ensure_coordinates_computed(self, orders):  
-        """Forcer le recalcul des coordonnées GPS depuis le JSON"""  
-        # Forcer le recalcul pour les VRP orders liés  
-        vrp_orders = self.env['vrp.order'].search([  
-            ('sale_order_id', 'in', orders.ids)  
-        ])  
-        if vrp_orders:  
-            # Déclencher manuellement le recalcul  
-            for vrp_order in vrp_orders:  
-                vrp_order._compute_coordinates()
-                
-    def _validate_orders_for_optimization(self, orders):
-        """Validation robuste avec gestion des coordonnées multiples"""
-        orders_without_coords = []
-        
-        for order in orders:
-            partner = order.partner_id
-            if not partner:
-                orders_without_coords.append(order)
-                continue
-                
-            coordinates = partner.coordinates
+            # Éviter les doubles lancements d'optimisations coûteuses
+            self.env['vrp.route.optimization']._check_no_pending_session()
             
-            # Variables pour stocker les coordonnées trouvées
-            lat, lng = 0.0, 0.0
-            coords_found = False
+            # Créer une session d'optimisation
+            if self.env.company.vrp_optimize_in_background:
+                # Calcul en tâche de fond: la requête rend la main immédiatement
+                optimization_session = self._create_optimization_session(selected_orders, status='queued')
+                optimization_session._record_stage_timings(profile)
+                optimization_session._enqueue()
+                return optimization_session._action_queued_notification()
             
-            # 1. Essayer d'abord les coordonnées JSON du partenaire
-            if coordinates and isinstance(coordinates, dict):
-                try:
-                    lat = float(coordinates.get('latitude', 0.0))
-                    lng = float(coordinates.get('longitude', 0.0))
-                    
-                    # Validation des coordonnées
-                    if -90 <= lat <= 90 and -180 <= lng <= 180 and (lat != 0.0 and lng != 0.0):
-                        coords_found = True
-                except (ValueError, TypeError):
-                    pass
+            optimization_session = self._create_optimization_session(selected_orders)
             
-            # 2. Si pas de coordonnées JSON, essayer les VRP orders liés
-            if not coords_found:
-                vrp_order = self.env['vrp.order'].search([
-                    ('sale_order_id', '=', order.id)
-                ], limit=1)
+            # Lancer l'optimisation avec l'algorithme amélioré
+            try:
+                with profiling.span('optimize'):
+                    result = self._run_enhanced_optimization(selected_orders, optimization_session)
                 
-                if vrp_order:
-                    # Forcer le recalcul des coordonnées
-                    vrp_order._compute_coordinates()
+                if result:
+                    # Appliquer les résultats
+                    with profiling.span('apply', orders=result['total_stops']):
+                        self._apply_enhanced_results(selected_orders, result, optimization_session)
+                    optimization_session._record_stage_timings(profile)
                     
-                    if vrp_order.partner_latitude and vrp_order.partner_longitude:
-                        if (vrp_order.partner_latitude != 0.0 and vrp_order.partner_longitude != 0.0):
-                            coords_found = True
-            
-            # 3. Si toujours pas de coordonnées, essayer les champs directs du partenaire
-            if not coords_found:
-                if hasattr(partner, 'partner_latitude') and hasattr(partner, 'partner_longitude'):
-                    if partner.partner_latitude and partner.partner_longitude:
-                        if (partner.partner_latitude != 0.0 and partner.partner_longitude != 0.0):
-                            coords_found = True
+                    # Notification de succès simple
+                    total_distance_km = result['total_distance'] / 1000
+                    vehicles_used = len(result['routes'])
+                    total_stops = result['total_stops']
+                    
+                    return {
+                        'type': 'ir.actions.client',
+                        'tag': 'display_notification',
+                        'params': {
+                            'title': 'Optimisation VRP Terminée',
+                            'message': f'Optimisation réussie: {total_distance_km:.1f} km, {vehicles_used} véhicules, {total_stops} arrêts',
+                            'type': 'success',
+                            'sticky': True,
+                        }
+                    }
+                else:
+                    raise UserError("Impossible de trouver une solution optimale")
+                    
+            except Exception as e:
+                _logger.error(f"Optimization failed: {str(e)}")
+                optimization_session.write({'status': 'failed', 'error_message': str(e)})
+                optimization_session._notify_progress('failed', str(e), force=True)
+                raise UserError(f"Erreur d'optimisation: {str(e)}")
+
+    def action_insert_into_current_plan(self):
+        """Insérer les commandes sélectionnées dans les tournées en cours, sans tout ré-optimiser
+
+        Les commandes déjà affectées gardent leur véhicule et leur ordre; les
+        arrêts jusqu'à la dernière affectation manuelle d'une tournée sont figés.
+        Seules les tournées qui reçoivent une commande sont réécrites.
+        """
+        selected_orders = self.env['sale.order'].browse(self.env.context.get('active_ids', [])).exists() or self
+        new_orders = selected_orders.filtered(lambda o: not o.assigned_vehicle_id)
+        if not new_orders:
+            raise UserError("Les commandes sélectionnées sont déjà affectées à une tournée")
+        self._validate_orders_for_optimization(new_orders)
+        
+        vehicles = self.env['fleet.vehicle']._get_vrp_vehicles()
+        if not vehicles:
+            raise UserError("Aucun véhicule avec chauffeur disponible")
+        
+        # Plan courant: commandes confirmées déjà affectées, dans l'ordre de visite
+        planned_orders = self.env['sale.order'].search([
+            ('assigned_vehicle_id', 'in', vehicles.ids),
+            ('state', 'in', ['sale', 'done']),
+        ], order='assigned_vehicle_id, delivery_sequence, id')
+        # Affectation manuelle marquée sur la commande ou sur sa commande VRP
+        manual_ids = set(self.env['vrp.order'].search([
+            ('sale_order_id', 'in', planned_orders.ids),
+            ('manual_assignment', '=', True),
+        ]).mapped('sale_order_id').ids)
+        current_routes = {}
+        frozen = {}
+        for order in planned_orders:
+            stops = current_routes.setdefault(order.assigned_vehicle_id.id, [])
+            stops.append(order.id)
+            if order.manual_assignment or order.id in manual_ids:
+                frozen[order.assigned_vehicle_id.id] = len(stops)
+        
+        optimizer = self.env['vrp.optimizer.enhanced'].create({})
+        result = optimizer.insert_orders_into_routes(current_routes, new_orders, vehicles, frozen)
+        self._apply_inserted_routes(current_routes, result)
+        
+        inserted = len(new_orders) - len(result['unassigned_order_ids'])
+        message = f"{inserted} commandes insérées dans {len(result['routes'])} tournées"
+        if result['unassigned_order_ids']:
+            message += f", {len(result['unassigned_order_ids'])} non placées (contraintes distance/arrêts ou coordonnées)"
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Insertion dans le Plan de Tournées',
+                'message': message,
+                'type': 'warning' if result['unassigned_order_ids'] else 'success',
+                'sticky': bool(result['unassigned_order_ids']),
+            }
+        }
+
+    def _apply_inserted_routes(self, current_routes, result):
+        """Réécrire les tournées modifiées à partir du premier arrêt changé
+
+        Les arrêts en tête inchangés (dont les affectations manuelles figées)
+        gardent séquence, heure d'arrivée et distance.
+        """
+        etas = result['etas']
+        depot_distances = result['depot_distances']
+        values_by_order = {}
+        for vehicle_id, order_ids in result['routes'].items():
+            previous = current_routes.get(vehicle_id, [])
+            unchanged = 0
+            while unchanged < min(len(previous), len(order_ids)) and previous[unchanged] == order_ids[unchanged]:
+                unchanged += 1
             
-            if not coords_found:
-                orders_without_coords.append(order)
+            for sequence, order_id in enumerate(order_ids[unchanged:], start=unchanged + 1):
+                values_by_order[order_id] = {
+                    'assigned_vehicle_id': vehicle_id,
+                    'delivery_sequence': sequence,
+                    'estimated_delivery_time': etas.get(order_id, 0.0),
+                    'road_distance_to_depot': depot_distances.get(order_id, 0.0),
+                }
+        self._bulk_write_assignments(values_by_order)
+
+    # Champs écrits par _bulk_write_assignments et leur type SQL (VALUES non typées)
+    ASSIGNMENT_FIELD_TYPES = {
+        'assigned_vehicle_id': 'int4',
+        'delivery_sequence': 'int4',
+        'manual_assignment': 'bool',
+        'estimated_delivery_time': 'float8',
+        'road_distance_to_depot': 'float8',
+    }
+    # Champs recopiés sur les VRP orders liés
+    VRP_ORDER_SYNC_FIELDS = ('assigned_vehicle_id', 'delivery_sequence', 'manual_assignment')
+
+    def _bulk_write_assignments(self, values_by_order):
+        """Écrire des valeurs propres à chaque commande en une requête UPDATE ... FROM (VALUES ...)
+
+        values_by_order: {id commande: {champ: valeur}}, mêmes champs (parmi
+        ASSIGNMENT_FIELD_TYPES) pour toutes les commandes; manual_assignment
+        à None laisse la valeur existante. Les VRP orders liés reçoivent
+        véhicule, séquence et affectation manuelle dans une seconde requête.
+        Les écritures ORM en attente sont envoyées avant, le cache ORM des
+        deux modèles est entièrement invalidé après (champs related comme
+        driver_id compris).
+
+        La requête directe ne passe ni par write() (surcharges), ni par le
+        suivi mail, ni par le recalcul des champs calculés stockés: seules
+        des colonnes simples, dont aucun champ stocké ne dépend, peuvent
+        être écrites par ce chemin.
+        """
+        if not values_by_order:
+            return
+        first_values = next(iter(values_by_order.values()))
+        field_names = [name for name in self.ASSIGNMENT_FIELD_TYPES if name in first_values]
+        synced_names = [name for name in field_names if name in self.VRP_ORDER_SYNC_FIELDS]
+        
+        sale_orders = self.env['sale.order'].browse(list(values_by_order))
+        vrp_orders = self.env['vrp.order'].search([('sale_order_id', 'in', sale_orders.ids)])
+        # La requête directe contourne l'ORM: droits vérifiés ici
+        sale_orders.check_access('write')
+        vrp_orders.check_access('write')
+        sale_orders.flush_model(field_names)
+        vrp_orders.flush_model(synced_names + ['sale_order_id'])
+        
+        rows = [
+            (order_id, *(values[name] or None if name == 'assigned_vehicle_id' else values[name] for name in field_names))
+            for order_id, values in values_by_order.items()
+        ]
+        template = '(%s::int4, ' + ', '.join(f'%s::{self.ASSIGNMENT_FIELD_TYPES[name]}' for name in field_names) + ')'
+        columns = ', '.join(field_names)
+        
+        def assignment(name):
+            if name == 'manual_assignment':
+                return f'{name} = COALESCE(v.{name}, target.{name})'
+            return f'{name} = v.{name}'
+        
+        with profiling.span('write', orders=len(rows)):
+            for table, key, names in (('sale_order', 'id', field_names), ('vrp_order', 'sale_order_id', synced_names)):
+                if not names or (table == 'vrp_order' and not vrp_orders):
+                    continue
+                assignments = ', '.join(assignment(name) for name in names)
+                execute_values(self.env.cr, f"""
+                    UPDATE {table} AS target
+                       SET {assignments},
+                           write_uid = {int(self.env.uid)},
+                           write_date = (now() at time zone 'UTC')
+                      FROM (VALUES %s) AS v(id, {columns})
+                     WHERE target.{key} = v.id
+                """, rows, template=template, page_size=1000)
+        
+        # Cache complet: les champs related (driver_id via assigned_vehicle_id) seraient sinon périmés
+        sale_orders.invalidate_model()
+        vrp_orders.invalidate_model()
+        _logger.info(f"Affectations écrites: {len(rows)} commandes, {len(vrp_orders)} VRP orders synchronisés")
+
+    def _validate_orders_for_optimization(self, orders):
+        """Validation robuste avec gestion des coordonnées multiples"""
+        _lats, _lngs, missing = orders._resolve_coordinates()
+        orders_without_coords = [order for order, is_missing in zip(orders, missing) if is_missing]
         
         if orders_without_coords:
             missing_partners = [o.partner_id.name or 'Client sans nom' for o in orders_without_coords]
@@ -187,12 +300,12 @@ class SaleOrderEnhanced(models.Model):
             
             raise UserError(error_msg)
 
-    def _create_optimization_session(self, orders):
+    def _create_optimization_session(self, orders, status='running'):
         """Créer une session d'optimisation pour tracer les résultats"""
         return self.env['vrp.route.optimization'].create({
             'name': f'Optimization {fields.Datetime.now().strftime("%Y-%m-%d %H:%M")}',
             'order_ids': [(6, 0, orders.ids)],
-            'status': 'running',
+            'status': status,
             'user_id': self.env.user.id,
             'company_id': self.env.company.id
         })
@@ -200,74 +313,80 @@ class SaleOrderEnhanced(models.Model):
     def _run_enhanced_optimization(self, orders, session):
         """Exécuter l'optimisation avec l'algorithme amélioré"""
         # Récupérer les véhicules disponibles
-        vehicles = self.env['fleet.vehicle'].search([
-            ('driver_id', '!=', False),
-            ('active', '=', True)
-        ])
+        vehicles = self.env['fleet.vehicle']._get_vrp_vehicles()
         
         if not vehicles:
             raise UserError("Aucun véhicule avec chauffeur disponible")
         
-        # Créer l'optimiseur amélioré
-        optimizer = self.env['vrp.optimizer.enhanced'].create({})
+        # Créer l'optimiseur amélioré (progression publiée sur la session)
+        optimizer = self.env['vrp.optimizer.enhanced'].with_context(
+            vrp_optimization_session_id=session.id
+        ).create({})
+        
+        # Démarrage à chaud depuis les tournées d'une session récente couvrant les mêmes commandes
+        warm_start = self.env['vrp.route.optimization']
+        if session.company_id.vrp_warm_start:
+            warm_start = session._find_warm_start(orders)
         
         # Lancer l'optimisation avec distances routières
         _logger.info(f"Starting enhanced VRP optimization for session {session.id}")
-        result = optimizer.solve_vrp_with_road_distances(orders, vehicles)
+        if warm_start:
+            _logger.info(f"Démarrage à chaud depuis la session {warm_start.id}")
+        result = optimizer.solve_vrp_with_road_distances(
+            orders, vehicles, initial_routes=warm_start._initial_routes() if warm_start else None
+        )
         
         if result:
-            _logger.info(f"Routes retournées : {result['routes']}")
-            for vehicle_id, order_ids in result['routes'].items():
-                _logger.info(f"Véhicule {vehicle_id}: commandes {order_ids}")
+            if profiling.verbose():
+                for vehicle_id, order_ids in result['routes'].items():
+                    _logger.info(f"Véhicule {vehicle_id}: commandes {order_ids}")
             # Enregistrer les statistiques de la session
             session.write({
                 'status': 'completed',
                 'total_distance': result['total_distance'],
+                'total_duration': result.get('total_duration', 0) / 60.0,
                 'total_stops': result['total_stops'],
                 'vehicles_used': len(result['routes']),
-                'optimization_stats': str(result['stats'])
+                'optimization_stats': str(result['stats']),
+                'solution_history': result.get('solution_history') or False,
+                'route_plan': {str(vehicle_id): order_ids for vehicle_id, order_ids in result['routes'].items()},
+                'warm_start_id': warm_start.id,
             })
         
         return result
 
     def _apply_enhanced_results(self, orders, result, session):
         """Appliquer les résultats de l'optimisation améliorée"""
-        # Reset des affectations précédentes
-        orders.write({
-            'assigned_vehicle_id': False,
-            'delivery_sequence': 0,
-        })
-
         routes = result['routes']
-        orders_dict = {order.id: order for order in orders}
-
+        etas = result.get('etas', {})
+        depot_distances = result.get('depot_distances', {})
+        
+        # Reset des affectations précédentes, puis tournées calculées (affectations manuelles conservées)
+        values_by_order = {
+            order_id: {
+                'assigned_vehicle_id': False,
+                'delivery_sequence': 0,
+                'estimated_delivery_time': 0.0,
+                'road_distance_to_depot': 0.0,
+            }
+            for order_id in orders.ids
+        }
         for vehicle_id, order_ids in routes.items():
-            vehicle = self.env['fleet.vehicle'].browse(vehicle_id)
-            
-            for sequence, order_id in enumerate(order_ids):
-                if order_id in orders_dict:
-                    order = orders_dict[order_id]
-                    order.write({
+            for sequence, order_id in enumerate(order_ids, start=1):
+                if order_id in values_by_order:
+                    values_by_order[order_id].update({
                         'assigned_vehicle_id': vehicle_id,
-                        'delivery_sequence': sequence + 1,
+                        'delivery_sequence': sequence,
+                        'estimated_delivery_time': etas.get(order_id, 0.0),
+                        'road_distance_to_depot': depot_distances.get(order_id, 0.0),
                     })
-                    _logger.info(f"Commande {order.name} assignée au véhicule {vehicle.name}, séquence {sequence + 1}")
-
-        # SYNCHRONISATION AUTOMATIQUE des VRP orders
-        for order in orders.filtered('assigned_vehicle_id'):
-            # Trouver le VRP order correspondant
-            vrp_order = self.env['vrp.order'].search([
-                ('sale_order_id', '=', order.id)
-            ], limit=1)
-        
-            if vrp_order:
-                vrp_order.write({
-                    'assigned_vehicle_id': order.assigned_vehicle_id.id,
-                    'delivery_sequence': order.delivery_sequence,
-                })
-                _logger.info(f"VRP Order synchronisé: {vrp_order.name} -> Véhicule: {order.assigned_vehicle_id.name}")
+        self._bulk_write_assignments(values_by_order)
 
-        _logger.info(f"VRP Orders synchronisés: {len(orders.filtered('assigned_vehicle_id'))} commandes")
+        session._notify_progress(
+            'done',
+            f"Résultats appliqués: {result['total_stops']} arrêts, {len(routes)} véhicules",
+            force=True
+        )
 
     # Reste du code inchangé...
     def action_show_enhanced_map(self):
@@ -335,7 +454,8 @@ class SaleOrderEnhanced(models.Model):
                 }
                 waypoints.append(waypoint)
                 total_distance += order.road_distance_to_depot or 0
-                total_time += order.estimated_delivery_time or 0
+                # Heure d'arrivée cumulée: la dernière donne la durée de la tournée
+                total_time = max(total_time, order.estimated_delivery_time or 0)
             
             # Retour au dépôt
             waypoints.append(depot)
@@ -385,16 +505,37 @@ class VRPRouteOptimization(models.Model):
     order_ids = fields.Many2many('sale.order', string='Session Orders')
 
     status = fields.Selection([
+        ('queued', 'En File d\'Attente'),
         ('running', 'En Cours'),
         ('completed', 'Terminé'),
         ('failed', 'Échec')
     ], 'Status', default='running')
     
     total_distance = fields.Float('Distance Totale (m)')
+    total_duration = fields.Float('Durée Totale (min)')
     total_stops = fields.Integer('Arrêts Totaux')
     vehicles_used = fields.Integer('Véhicules Utilisés')
     optimization_stats = fields.Text('Statistics JSON')
+    solution_history = fields.Json(
+        'Historique des Solutions',
+        help="Solutions améliorantes trouvées par OR-Tools: temps écoulé (s) et coût"
+    )
+    route_plan = fields.Json(
+        'Tournées',
+        help="Commandes par véhicule dans l'ordre de livraison ({id véhicule: [ids commandes]})"
+    )
+    stage_timings = fields.Json(
+        'Temps par Étape',
+        help="Durée (s), requêtes SQL et volumes de chaque étape du calcul (tools.profiling)"
+    )
+    stage_timings_summary = fields.Text('Détail des Étapes', compute='_compute_stage_timings_summary')
+    warm_start_id = fields.Many2one(
+        'vrp.route.optimization', 'Démarrage à Chaud Depuis', readonly=True,
+        help="Session dont les tournées ont servi de solution initiale"
+    )
     error_message = fields.Text('Error Message')
+    started_at = fields.Datetime('Démarré le')
+    finished_at = fields.Datetime('Terminé le')
     
     create_date = fields.Datetime('Created On', default=fields.Datetime.now)
 
@@ -403,4 +544,231 @@ class VRPRouteOptimization(models.Model):
         for record in self:
             name = f"{record.name} ({record.total_stops} arrêts, {record.vehicles_used} véhicules)"
             result.append((record.id, name))
-        return result
\ No newline at end of file
+        return result
+
+    @api.depends('stage_timings')
+    def _compute_stage_timings_summary(self):
+        for record in self:
+            timings = record.stage_timings or {}
+            lines = [
+                f"{entry['stage']}: {entry['duration']:.2f} s, {entry['queries']} requêtes"
+                + ''.join(f", {key}={value}" for key, value in entry.items() if key not in ('stage', 'duration', 'queries'))
+                for entry in timings.get('stages', [])
+            ]
+            if lines:
+                lines.append(f"Total: {timings['total']:.2f} s")
+            record.stage_timings_summary = '\n'.join(lines)
+
+    def _record_stage_timings(self, profile):
+        """Ajouter les étapes d'un profil à celles déjà enregistrées sur la session
+
+        Une session en tâche de fond cumule la validation (requête) et le
+        calcul (cron).
+        """
+        self.ensure_one()
+        report = profile.report()
+        previous = self.stage_timings or {'total': 0.0, 'stages': []}
+        self.write({'stage_timings': {
+            'total': round(previous['total'] + report['total'], 4),
+            'stages': previous['stages'] + report['stages'],
+        }})
+
+    # ---------------------------------------------------------------
+    # Démarrage à chaud
+    # ---------------------------------------------------------------
+
+    # Part minimale des commandes à optimiser déjà planifiées dans la session de départ
+    WARM_START_MIN_OVERLAP = 0.5
+
+    def _find_warm_start(self, orders):
+        """Session terminée la plus récente de la société dont les tournées
+        couvrent au moins WARM_START_MIN_OVERLAP des commandes"""
+        self.ensure_one()
+        candidates = self.search([
+            ('id', '!=', self.id),
+            ('company_id', '=', self.company_id.id),
+            ('status', '=', 'completed'),
+            ('route_plan', '!=', False),
+        ], order='id desc', limit=5)
+        
+        order_ids = set(orders.ids)
+        for candidate in candidates:
+            planned = {order_id for route in candidate.route_plan.values() for order_id in route}
+            if len(order_ids & planned) >= self.WARM_START_MIN_OVERLAP * len(order_ids):
+                return candidate
+        return self.browse()
+
+    def _initial_routes(self):
+        """Tournées enregistrées, au format attendu par l'optimiseur ({id véhicule: [ids commandes]})"""
+        self.ensure_one()
+        return {int(vehicle_id): order_ids for vehicle_id, order_ids in (self.route_plan or {}).items()}
+
+    # ---------------------------------------------------------------
+    # Exécution en tâche de fond (file d'attente traitée par cron)
+    # ---------------------------------------------------------------
+
+    # Une session « running » plus ancienne est considérée comme perdue (worker arrêté)
+    JOB_TIMEOUT_HOURS = 2
+
+    def _enqueue(self):
+        """Mettre les sessions en file d'attente et réveiller le cron immédiatement"""
+        self.write({'status': 'queued', 'error_message': False})
+        self.env.ref('delivery_vrp.ir_cron_vrp_optimization_jobs')._trigger()
+
+    def _action_queued_notification(self):
+        """Notification de mise en file, puis ouverture de la session"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Optimisation VRP Lancée',
+                'message': f'{len(self.order_ids)} commandes en cours d\'optimisation en tâche de fond',
+                'type': 'info',
+                'sticky': False,
+                'next': {
+                    'type': 'ir.actions.act_window',
+                    'res_model': 'vrp.route.optimization',
+                    'res_id': self.id,
+                    'views': [(False, 'form')],
+                    'target': 'current',
+                },
+            }
+        }
+
+    def action_retry(self):
+        """Relancer une session en échec"""
+        self.filtered(lambda s: s.status == 'failed')._enqueue()
+
+    @api.model
+    def _process_queued_jobs(self, limit=5):
+        """Cron: exécuter les sessions en file d'attente, chacune dans sa propre transaction"""
+        self._fail_stale_jobs()
+
+        for _job in range(limit):
+            # SKIP LOCKED: plusieurs workers cron peuvent traiter la file en parallèle
+            self.env.cr.execute("""
+                SELECT id FROM vrp_route_optimization
+                 WHERE status = 'queued'
+                 ORDER BY id
+                 LIMIT 1
+                 FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                break
+
+            session = self.browse(row[0])
+            session.write({'status': 'running', 'started_at': fields.Datetime.now()})
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+            session._run_job()
+
+    def _fail_stale_jobs(self):
+        """Marquer en échec les sessions restées « running » au-delà du délai"""
+        limit_date = fields.Datetime.now() - timedelta(hours=self.JOB_TIMEOUT_HOURS)
+        stale = self.search([('status', '=', 'running'), ('started_at', '<', limit_date)])
+        if stale:
+            stale.write({
+                'status': 'failed',
+                'error_message': "Optimisation interrompue (délai dépassé ou worker arrêté)",
+                'finished_at': fields.Datetime.now(),
+            })
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+
+    def _run_job(self):
+        """Calcul, application des résultats et statut, avec les droits du demandeur"""
+        self.ensure_one()
+        session = self.with_user(self.user_id).with_company(self.company_id)
+        orders = session.order_ids.exists()
+        _logger.info(f"Session {self.id}: optimisation en tâche de fond de {len(orders)} commandes")
+
+        with profiling.profile(self.env.cr, verbose=self.company_id.vrp_debug_logging) as profile:
+            try:
+                if not orders:
+                    raise UserError("Les commandes de la session n'existent plus")
+                with profiling.span('optimize'):
+                    result = orders._run_enhanced_optimization(orders, session)
+                if not result:
+                    raise UserError("Impossible de trouver une solution optimale")
+                with profiling.span('apply', orders=result['total_stops']):
+                    orders._apply_enhanced_results(orders, result, session)
+                session._record_stage_timings(profile)
+                session.write({'finished_at': fields.Datetime.now()})
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error(f"Session {self.id}: optimisation échouée: {str(e)}")
+                self.write({
+                    'status': 'failed',
+                    'error_message': str(e),
+                    'finished_at': fields.Datetime.now(),
+                })
+                # Étapes franchies avant l'échec
+                self._record_stage_timings(profile)
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+                self._notify_progress('failed', str(e), force=True)
+
+    # ---------------------------------------------------------------
+    # Progression en direct (bus)
+    # ---------------------------------------------------------------
+
+    # Intervalle minimal (s) entre deux événements d'une même étape
+    PROGRESS_THROTTLE = 1.0
+
+    # Clé du verrou consultatif PostgreSQL (par utilisateur) des lancements d'optimisation
+    LAUNCH_LOCK_KEY = 0x56525031
+
+    @api.model
+    def _check_no_pending_session(self):
+        """Refuser un nouveau lancement tant qu'une optimisation de l'utilisateur est en cours
+
+        Une session synchrone n'est visible des autres requêtes qu'après le
+        commit: le verrou consultatif de l'utilisateur, tenu jusqu'à la fin
+        de la transaction (calcul compris en mode synchrone), refuse aussi
+        un lancement concurrent pendant ce temps.
+        """
+        self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", (self.LAUNCH_LOCK_KEY, self.env.uid))
+        if not self.env.cr.fetchone()[0]:
+            raise UserError(
+                "Une optimisation est déjà en cours de lancement ou de calcul. "
+                "Attendez sa fin avant d'en lancer une nouvelle."
+            )
+        recent = fields.Datetime.now() - timedelta(hours=self.JOB_TIMEOUT_HOURS)
+        pending = self.search([
+            ('user_id', '=', self.env.uid),
+            ('status', 'in', ('queued', 'running')),
+            ('create_date', '>=', recent),
+        ], limit=1)
+        if pending:
+            raise UserError(
+                f"L'optimisation « {pending.name} » est déjà en cours. "
+                f"Attendez sa fin avant d'en lancer une nouvelle."
+            )
+
+    def _notify_progress(self, stage, message, force=False, **values):
+        """Publier un événement de progression au demandeur de la session
+
+        Les événements d'une même étape sont limités à un par PROGRESS_THROTTLE
+        secondes (sauf force). Ils sont envoyés sur un curseur séparé pour être
+        visibles immédiatement, la transaction de l'optimisation n'étant
+        validée qu'à la fin.
+        """
+        self.ensure_one()
+        now = time.monotonic()
+        last = _progress_sent.get(self.id)
+        if not force and last and last[0] == stage and now - last[1] < self.PROGRESS_THROTTLE:
+            return
+        _progress_sent[self.id] = (stage, now)
+        if stage in ('done', 'failed'):
+            _progress_sent.pop(self.id, None)
+
+        payload = dict(values, session_id=self.id, name=self.name, stage=stage, message=message)
+        partner_id = self.user_id.partner_id.id
+        try:
+            with self.env.registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['bus.bus']._sendone(
+                    env['res.partner'].browse(partner_id), 'vrp_optimization_progress', payload
+                )
+        except Exception as e:
+            _logger.warning(f"Progression non publiée pour la session {self.id}: {str(e)}")
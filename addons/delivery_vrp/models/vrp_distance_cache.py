@@ -0,0 +1,127 @@
+# models/vrp_distance_cache.py - CACHE PERSISTANT DES DISTANCES ROUTIÈRES
+from odoo import models, fields, api
+from psycopg2.extras import execute_values
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Précision des clés de coordonnées (5 décimales ≈ 1 mètre)
+COORDINATE_KEY_PRECISION = 5
+
+
+class VRPDistanceCache(models.Model):
+    _name = 'vrp.distance.cache'
+    _description = 'VRP Road Distance Cache'
+    _log_access = False
+
+    service = fields.Char('Service de Routage', required=True)
+    origin_key = fields.Char('Origine', required=True)
+    destination_key = fields.Char('Destination', required=True)
+    distance = fields.Float('Distance (m)')
+    duration = fields.Float('Durée (s)')
+    fetched_at = fields.Datetime('Calculé le', required=True, index=True, default=fields.Datetime.now)
+
+    _sql_constraints = [
+        ('pair_service_uniq', 'unique(service, origin_key, destination_key)',
+         'Une seule entrée de cache par couple de coordonnées et service'),
+    ]
+
+    @api.model
+    def _coordinate_key(self, lat, lng):
+        """Clé arrondie d'une coordonnée (indépendante des micro-variations GPS)"""
+        return f"{float(lat):.{COORDINATE_KEY_PRECISION}f},{float(lng):.{COORDINATE_KEY_PRECISION}f}"
+
+    def _get_cache_limits(self):
+        """TTL et taille maximale configurés sur la société"""
+        company = self.env.company
+        ttl_days = getattr(company, 'vrp_distance_cache_ttl_days', 30) or 30
+        max_entries = getattr(company, 'vrp_distance_cache_max_entries', 500000) or 500000
+        return ttl_days, max_entries
+
+    @api.model
+    def _lookup_pairs(self, service, keys, new_keys=None):
+        """Récupérer les paires en cache non expirées entre les clés données
+
+        Si new_keys est fourni, seules les paires dont l'origine ou la
+        destination est une nouvelle clé sont retournées.
+        Retourne un dict {(origin_key, destination_key): (distance, duration)}.
+        """
+        unique_keys = list(set(keys))
+        if not unique_keys or new_keys is not None and not new_keys:
+            return {}
+
+        ttl_days, _max_entries = self._get_cache_limits()
+        min_date = fields.Datetime.now() - timedelta(days=ttl_days)
+
+        query = """
+            SELECT origin_key, destination_key, distance, duration
+              FROM vrp_distance_cache
+             WHERE service = %s
+               AND origin_key = ANY(%s)
+               AND destination_key = ANY(%s)
+               AND fetched_at >= %s
+        """
+        params = [service, unique_keys, unique_keys, min_date]
+        if new_keys is not None:
+            query += " AND (origin_key = ANY(%s) OR destination_key = ANY(%s))"
+            params += [list(set(new_keys))] * 2
+        self.env.cr.execute(query, params)
+
+        return {
+            (origin, destination): (distance, duration)
+            for origin, destination, distance, duration in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _store_pairs(self, service, pairs):
+        """Enregistrer (ou rafraîchir) des paires calculées par le service de routage
+
+        Appelé en sudo: les utilisateurs n'ont que la lecture sur le cache.
+        La taille maximale est appliquée par le nettoyage quotidien, pas ici
+        (le comptage parcourt toute la table).
+        pairs: liste de tuples (origin_key, destination_key, distance, duration)
+        """
+        if not pairs:
+            return 0
+
+        now = fields.Datetime.now()
+        execute_values(self.env.cr, """
+            INSERT INTO vrp_distance_cache
+                   (service, origin_key, destination_key, distance, duration, fetched_at)
+            VALUES %s
+            ON CONFLICT (service, origin_key, destination_key)
+            DO UPDATE SET distance = EXCLUDED.distance,
+                          duration = EXCLUDED.duration,
+                          fetched_at = EXCLUDED.fetched_at
+        """, [(service, origin, destination, distance, duration, now)
+              for origin, destination, distance, duration in pairs], page_size=1000)
+        return len(pairs)
+
+    @api.model
+    def _evict_overflow(self, max_entries):
+        """Supprimer les entrées les plus anciennes au-delà de la taille maximale"""
+        self.env.cr.execute("SELECT count(*) FROM vrp_distance_cache")
+        overflow = self.env.cr.fetchone()[0] - max_entries
+        if overflow <= 0:
+            return 0
+
+        self.env.cr.execute("""
+            DELETE FROM vrp_distance_cache
+             WHERE id IN (SELECT id FROM vrp_distance_cache ORDER BY fetched_at, id LIMIT %s)
+        """, (overflow,))
+        _logger.info(f"Cache distances: {overflow} entrées les plus anciennes supprimées")
+        return overflow
+
+    @api.autovacuum
+    def _gc_expired_entries(self):
+        """Nettoyage quotidien: entrées expirées puis dépassement de taille"""
+        companies = self.env['res.company'].sudo().search([])
+        ttl_days = max(companies.mapped('vrp_distance_cache_ttl_days') or [30]) or 30
+        max_entries = max(companies.mapped('vrp_distance_cache_max_entries') or [500000]) or 500000
+
+        min_date = fields.Datetime.now() - timedelta(days=ttl_days)
+        self.env.cr.execute("DELETE FROM vrp_distance_cache WHERE fetched_at < %s", (min_date,))
+        _logger.info(f"Cache distances: {self.env.cr.rowcount} entrées expirées supprimées")
+
+        self._evict_overflow(max_entries)
@@ -4,6 +4,9 @@ from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 import math
 
+from ..tools import anytime
+from ..tools import geo
+
 class VRPOptimizer(models.TransientModel):
     _name = 'vrp.optimizer'
     _description = 'VRP Optimization Engine'
@@ -20,20 +23,8 @@ class VRPOptimizer(models.TransientModel):
         return R * c
 
     def create_distance_matrix(self, locations):
-        """Création de la matrice de distance"""
-        matrix = []
-        for from_counter, from_node in enumerate(locations):
-            matrix.append([])
-            for to_counter, to_node in enumerate(locations):
-                if from_counter == to_counter:
-                    matrix[from_counter].append(0)
-                else:
-                    distance = self._calculate_distance(
-                        from_node['lat'], from_node['lng'],
-                        to_node['lat'], to_node['lng']
-                    )
-                    matrix[from_counter].append(int(distance * 1000))  # Convert to meters
-        return matrix
+        """Création de la matrice de distance (mètres, int32, calcul vectorisé)"""
+        return geo.location_matrix(locations)
 
     def solve_vrp(self, sale_orders, vehicles):
         """Résolution du problème VRP"""
@@ -52,7 +43,7 @@ class VRPOptimizer(models.TransientModel):
         
         # Configuration du problème
         data = {
-            'distance_matrix': distance_matrix,
+            'distance_matrix': distance_matrix.tolist(),
             'num_vehicles': len(vehicles),
             'depot': 0
         }
@@ -65,12 +56,8 @@ class VRPOptimizer(models.TransientModel):
         )
         routing = pywrapcp.RoutingModel(manager)
 
-        def distance_callback(from_index, to_index):
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return data['distance_matrix'][from_node][to_node]
-
-        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+        # Matrice native: pas de rappel Python à chaque évaluation d'arc
+        transit_callback_index = routing.RegisterTransitMatrix(data['distance_matrix'])
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
         # Configuration des contraintes
@@ -90,6 +77,12 @@ class VRPOptimizer(models.TransientModel):
         search_parameters.first_solution_strategy = (
             routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
         )
+        # Budget de temps société et arrêt après un plateau sans amélioration
+        company = self.env.company
+        search_parameters.time_limit.FromSeconds(int(company.vrp_solver_time_limit or 30))
+        # Référence conservée: OR-Tools ne garde pas le rappel Python en vie
+        monitor = anytime.SolutionMonitor(routing, company.vrp_solver_plateau_time)
+        monitor.attach()
 
         # Résolution
         solution = routing.SolveWithParameters(search_parameters)
@@ -1,13 +1,25 @@
 # models/vrp_optimizer_enhanced.py - MODIFICATION POUR DÉPÔT PAR CHAUFFEUR
 from odoo import models, fields, api
-from ortools.constraint_solver import routing_enums_pb2
-from ortools.constraint_solver import pywrapcp
 from odoo.exceptions import UserError, ValidationError
-import requests
+from odoo.tools import config
 import json
 import time
 import math
 import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from ..tools import decomposition
+from ..tools import geo
+from ..tools import insertion
+from ..tools import matrix_store
+from ..tools import multi_depot
+from ..tools import problem
+from ..tools import profiling
+from ..tools import routing_http
+from ..tools import routing_backends
+from ..tools import sequencing
+from ..tools import spatial
 
 _logger = logging.getLogger(__name__)
 
@@ -37,46 +49,80 @@ class VRPOptimizerEnhanced(models.TransientModel):
             'free': True,
             'requires_key': True,
             'daily_limit': 2000
+        },
+        'local': {
+            'max_locations': 5000,
+            'snap_tolerance': 50,
+            'free': True
+        },
+        'road_graph': {
+            'max_locations': 5000,
+            'snap_tolerance': 2000,
+            'free': True
         }
     }
 
+    # Nombre maximum de tuiles de matrice demandées en parallèle
+    ROUTING_TILE_WORKERS = 4
+
+    # Délai (s) avant d'envoyer la requête de couverture au backend secondaire
+    ROUTING_HEDGE_DELAY = 1.0
+
+    # Mode sparse: détour appliqué sans arc routier mesuré, et distance
+    # minimale (m) des arcs utilisés pour mesurer le détour
+    SPARSE_DEFAULT_DETOUR_FACTOR = 1.3
+    SPARSE_MIN_SAMPLE_DISTANCE = 100
+
+    # Budget de temps (s) de la recherche locale 2-opt / Or-opt par tournée
+    SEQUENCING_TIME_BUDGET = 1.0
+
+    # Vitesse moyenne (m/s, 40 km/h) des durées estimées sans service de routage
+    ROUTING_FALLBACK_SPEED = 40 / 3.6
+
+    # Processus de résolution des clusters en parallèle, si activé (None = nombre de cœurs)
+    DECOMPOSITION_MAX_WORKERS = None
+
     def _get_company_settings(self):
         """MODIFIÉ: Récupérer les paramètres de routage (sans dépôt fixe)"""
         return {
             'routing_service': getattr(self.env.company, 'vrp_routing_service', 'osrm'),
             'openrouteservice_key': getattr(self.env.company, 'vrp_openrouteservice_key', ''),
             'graphhopper_key': getattr(self.env.company, 'vrp_graphhopper_key', ''),
+            'hedge_service': getattr(self.env.company, 'vrp_routing_hedge_service', False),
+            'local_matrix_path': getattr(self.env.company, 'vrp_local_matrix_path', ''),
+            'road_graph_path': getattr(self.env.company, 'vrp_road_graph_path', ''),
+            'matrix_mode': getattr(self.env.company, 'vrp_matrix_mode', 'dense'),
+            'matrix_knn': getattr(self.env.company, 'vrp_matrix_knn', 10),
+            'optimization_engine': getattr(self.env.company, 'vrp_optimization_engine', 'ortools'),
+            'solver_time_limit': getattr(self.env.company, 'vrp_solver_time_limit', 30),
+            'solver_plateau_time': getattr(self.env.company, 'vrp_solver_plateau_time', 10),
+            'max_route_distance': getattr(self.env.company, 'vrp_max_route_distance', 1000),
+            'max_stops_per_route': getattr(self.env.company, 'vrp_max_stops_per_route', 100),
+            'decomposition_mode': getattr(self.env.company, 'vrp_decomposition_mode', 'none'),
+            'cluster_max_orders': getattr(self.env.company, 'vrp_cluster_max_orders', 250),
+            'parallel_clusters': getattr(self.env.company, 'vrp_parallel_clusters', False),
             # Plus de dépôt fixe - sera calculé par véhicule/chauffeur
         }
 
+    def _report_progress(self, stage, message, force=False, **values):
+        """Publier l'avancement sur la session d'optimisation du contexte (si fournie)"""
+        session_id = self.env.context.get('vrp_optimization_session_id')
+        if session_id:
+            self.env['vrp.route.optimization'].browse(session_id)._notify_progress(
+                stage, message, force=force, **values
+            )
+
     def _get_driver_coordinates(self, vehicle):
-        """NOUVEAU: Récupérer les coordonnées d'un chauffeur"""
+        """NOUVEAU: Récupérer les coordonnées d'un chauffeur (cache fleet.vehicle)"""
         if not vehicle.driver_id:
             _logger.error(f"Véhicule {vehicle.name} sans chauffeur assigné")
             return None, None, False
         
-        driver = vehicle.driver_id
-        
-        # 1. Essayer les coordonnées JSON du chauffeur
-        if driver.coordinates and isinstance(driver.coordinates, dict):
-            try:
-                lat = float(driver.coordinates.get('latitude', 0.0))
-                lng = float(driver.coordinates.get('longitude', 0.0))
-                
-                if -90 <= lat <= 90 and -180 <= lng <= 180 and (lat != 0.0 and lng != 0.0):
-                    _logger.info(f"✓ Coordonnées chauffeur {driver.name}: {lat}, {lng} (JSON)")
-                    return lat, lng, True
-            except (ValueError, TypeError):
-                pass
-        
-        # 2. Essayer les champs directs si disponibles
-        if hasattr(driver, 'partner_latitude') and hasattr(driver, 'partner_longitude'):
-            if driver.partner_latitude and driver.partner_longitude:
-                if (driver.partner_latitude != 0.0 and driver.partner_longitude != 0.0):
-                    _logger.info(f"✓ Coordonnées chauffeur {driver.name}: {driver.partner_latitude}, {driver.partner_longitude} (champs)")
-                    return driver.partner_latitude, driver.partner_longitude, True
-        
-        _logger.warning(f"✗ Aucune coordonnée trouvée pour le chauffeur {driver.name}")
+        coordinates = vehicle._get_vrp_depot_coordinates()[vehicle.id]
+        if coordinates:
+            return coordinates[0], coordinates[1], True
+        
+        _logger.warning(f"✗ Aucune coordonnée trouvée pour le chauffeur {vehicle.driver_id.name}")
         return None, None, False
 
     def _calculate_euclidean_distance(self, lat1, lon1, lat2, lon2):
@@ -90,34 +136,255 @@ class VRPOptimizerEnhanced(models.TransientModel):
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         return R * c * 1000  # Retour en mètres
 
-    def _get_osrm_matrix(self, locations):
-        """Calculer la matrice de distance via OSRM (inchangé)"""
+    def _get_routing_backends(self, settings):
+        """Backends à interroger: service de la société puis service de couverture"""
+        names = [settings['routing_service']]
+        hedge_service = settings.get('hedge_service')
+        if hedge_service and hedge_service not in names:
+            names.append(hedge_service)
+
+        backends = []
+        for name in names:
+            backend = routing_backends.get_backend(name, self.ROUTING_SERVICES.get(name, {}), settings)
+            if backend is None:
+                _logger.warning(f"Service {name} sans backend enregistré, ignoré")
+                continue
+            backends.append(backend)
+        return backends
+
+    def _get_osrm_matrix(self, locations, sources=None, destinations=None):
+        """Calculer la matrice de distance via OSRM (compatibilité)
+
+        sources/destinations: indices (dans locations) des lignes/colonnes voulues.
+        Par défaut toute la matrice est calculée.
+        """
+        backend = routing_backends.get_backend('osrm', self.ROUTING_SERVICES['osrm'], self._get_company_settings())
+        all_indexes = list(range(len(locations)))
         try:
-            coords_str = ";".join([f"{loc['lng']},{loc['lat']}" for loc in locations])
-            url = f"http://router.project-osrm.org/table/v1/driving/{coords_str}"
-            
-            params = {'annotations': 'distance,duration'}
-            
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data['code'] != 'Ok':
-                raise Exception(f"OSRM Error: {data.get('message', 'Unknown error')}")
-            
-            distance_matrix = data['distances']
-            duration_matrix = data['durations']
-            
+            distances, durations = backend.table(
+                locations,
+                all_indexes if sources is None else sources,
+                all_indexes if destinations is None else destinations
+            )
             _logger.info(f"OSRM matrix calculée avec succès pour {len(locations)} locations")
-            return distance_matrix, duration_matrix
-            
+            return distances.tolist(), durations.tolist()
+        except routing_http.CircuitOpenError:
+            _logger.info("OSRM indisponible (circuit ouvert), requête ignorée")
+            return None, None
         except Exception as e:
             _logger.error(f"Requête OSRM échouée: {str(e)}")
             return None, None
 
+    def _split_matrix_tiles(self, max_locations, sources, destinations, missing_mask):
+        """Découper sources x destinations en tuiles respectant max_locations
+
+        Chaque tuile envoie au plus max_locations coordonnées (sources ∪ destinations).
+        Les tuiles sans paire manquante ne sont pas retournées.
+        Retourne une liste de (positions lignes, positions colonnes).
+        """
+        chunk = max(1, max_locations // 2)
+
+        tiles = []
+        for row_start in range(0, len(sources), chunk):
+            for col_start in range(0, len(destinations), chunk):
+                rows = np.arange(row_start, min(row_start + chunk, len(sources)))
+                cols = np.arange(col_start, min(col_start + chunk, len(destinations)))
+                if missing_mask[np.ix_(rows, cols)].any():
+                    tiles.append((rows, cols))
+        return tiles
+
+    def _split_arc_tiles(self, max_locations, locations, sources, missing_mask):
+        """Regrouper des arcs épars (mode k plus proches voisins) en tuiles
+
+        Les lignes sont parcourues dans l'ordre géographique et ajoutées à la
+        tuile courante tant que lignes + union de leurs colonnes tiennent dans
+        max_locations: des voisins proches partagent la plupart de leurs colonnes,
+        le nombre de tuiles reste donc proche de N·k / max_locations.
+        """
+        lats = np.array([locations[i]['lat'] for i in sources])
+        lngs = np.array([locations[i]['lng'] for i in sources])
+        # Ordre par bandes de latitude (~5 km) puis longitude
+        row_order = np.lexsort((lngs, np.floor(lats / 0.05)))
+
+        tiles = []
+        tile_rows, tile_cols = [], set()
+        for row in row_order.tolist():
+            cols = np.flatnonzero(missing_mask[row])
+            if not len(cols):
+                continue
+
+            if len(cols) + 1 > max_locations:
+                # Ligne trop large: découpée seule
+                for start in range(0, len(cols), max(1, max_locations - 1)):
+                    tiles.append((np.array([row]), cols[start:start + max_locations - 1]))
+                continue
+
+            merged = tile_cols.union(cols.tolist())
+            if tile_rows and len(tile_rows) + 1 + len(merged) > max_locations:
+                tiles.append((np.array(tile_rows), np.array(sorted(tile_cols))))
+                tile_rows, merged = [], set(cols.tolist())
+            tile_rows.append(row)
+            tile_cols = merged
+
+        if tile_rows:
+            tiles.append((np.array(tile_rows), np.array(sorted(tile_cols))))
+        return tiles
+
+    def _fetch_matrix_tile(self, backends, locations, tile_sources, tile_destinations, executor=None):
+        """Calculer une tuile de matrice (exécuté dans un thread, sans accès ORM)
+
+        Retourne (distances, durations, service) ou (None, None, None) en cas d'échec.
+        """
+        subset = np.union1d(tile_sources, tile_destinations)
+        subset_locations = [locations[index] for index in subset]
+
+        try:
+            return routing_backends.hedged_table(
+                backends,
+                subset_locations,
+                np.searchsorted(subset, tile_sources).tolist(),
+                np.searchsorted(subset, tile_destinations).tolist(),
+                hedge_delay=self.ROUTING_HEDGE_DELAY,
+                executor=executor
+            )
+        except routing_http.CircuitOpenError as e:
+            _logger.info(f"Tuile ignorée: {e}")
+        except Exception as e:
+            _logger.error(f"Tuile de matrice en échec: {str(e)}")
+        return None, None, None
+
+    def _fetch_missing_road_pairs(self, settings, locations, missing_pairs, sparse=False):
+        """Interroger les backends de routage uniquement pour les paires absentes du cache
+
+        Les paires sont regroupées en tuiles (limite max_locations des backends)
+        calculées en parallèle puis réassemblées. En mode sparse, les tuiles
+        suivent les arcs demandés au lieu de couvrir tout le bloc.
+
+        missing_pairs: tableau (K, 2) d'indices (i, j).
+        Retourne (sources, destinations, distances, durations, answered_by, services)
+        où les blocs sont des tableaux float64 (NaN = paire injoignable) et
+        answered_by donne l'indice dans services du service ayant calculé
+        chaque paire (-1 = non calculée), ou None si aucune tuile n'a abouti.
+        """
+        sources = np.unique(missing_pairs[:, 0])
+        destinations = np.unique(missing_pairs[:, 1])
+
+        missing_mask = np.zeros((len(sources), len(destinations)), dtype=bool)
+        missing_mask[
+            np.searchsorted(sources, missing_pairs[:, 0]),
+            np.searchsorted(destinations, missing_pairs[:, 1])
+        ] = True
+
+        backends = [backend for backend in self._get_routing_backends(settings) if backend.is_available()]
+        if not backends:
+            _logger.warning("Aucun service de routage disponible, fallback immédiat")
+            return None
+
+        max_locations = min(backend.max_locations for backend in backends)
+        if sparse:
+            tiles = self._split_arc_tiles(max_locations, locations, sources, missing_mask)
+        else:
+            tiles = self._split_matrix_tiles(max_locations, sources, destinations, missing_mask)
+        workers = max(1, min(self.ROUTING_TILE_WORKERS, len(tiles)))
+
+        services = [backend.name for backend in backends]
+        distances = np.full(missing_mask.shape, np.nan)
+        durations = np.full(missing_mask.shape, np.nan)
+        answered_by = np.full(missing_mask.shape, -1, dtype=np.int8)
+
+        # Requêtes couvertes de toutes les tuiles dans un pool borné commun (séparé
+        # du pool des tuiles, qui y attendent leurs réponses)
+        with (
+            routing_backends.hedge_pool(workers * len(backends)) as request_executor,
+            ThreadPoolExecutor(max_workers=workers) as executor,
+        ):
+            futures = [
+                (rows, cols, executor.submit(
+                    self._fetch_matrix_tile, backends, locations, sources[rows], destinations[cols],
+                    request_executor
+                ))
+                for rows, cols in tiles
+            ]
+            failed_tiles = 0
+            for done, (rows, cols, future) in enumerate(futures, start=1):
+                tile_distances, tile_durations, service = future.result()
+                self._report_progress(
+                    'matrix', f"Matrice routière: {done}/{len(tiles)} tuiles",
+                    done=done, total=len(tiles), force=done == len(tiles)
+                )
+                if tile_distances is None:
+                    # Repli par tuile: les paires restent à compléter à vol d'oiseau
+                    failed_tiles += 1
+                    continue
+                block = np.ix_(rows, cols)
+                distances[block] = tile_distances
+                durations[block] = tile_durations
+                answered_by[block] = services.index(service)
+
+        _logger.info(f"Matrice par tuiles: {len(tiles) - failed_tiles}/{len(tiles)} tuiles obtenues")
+
+        if failed_tiles == len(tiles):
+            return None
+        return sources, destinations, distances, durations, answered_by, services
+
+    def _knn_arc_mask(self, haversine, neighbors):
+        """Arcs retenus en mode sparse: k plus proches voisins à vol d'oiseau
+
+        Le masque est symétrisé pour que le retour d'un arc retenu soit aussi
+        calculé par la route.
+        """
+        size = len(haversine)
+        candidates = haversine.astype(np.int64)
+        np.fill_diagonal(candidates, np.iinfo(np.int64).max)
+        nearest = np.argpartition(candidates, neighbors - 1, axis=1)[:, :neighbors]
+
+        arc_mask = np.zeros((size, size), dtype=bool)
+        arc_mask[np.arange(size)[:, None], nearest] = True
+        arc_mask |= arc_mask.T
+        np.fill_diagonal(arc_mask, False)
+        return arc_mask
+
+    def _estimate_detour_factor(self, road_distances, haversine):
+        """Rapport médian route / vol d'oiseau mesuré sur les arcs connus"""
+        sample = (
+            ~np.isnan(road_distances) & (road_distances < 999999)
+            & (haversine > self.SPARSE_MIN_SAMPLE_DISTANCE)
+        )
+        if not sample.any():
+            return self.SPARSE_DEFAULT_DETOUR_FACTOR
+        ratios = road_distances[sample] / haversine[sample]
+        return float(np.clip(np.median(ratios), 1.0, 3.0))
+
+    def _estimate_pace(self, road_distances, road_durations):
+        """Allure médiane (secondes par mètre) mesurée sur les arcs routiers connus"""
+        sample = (
+            ~np.isnan(road_distances) & ~np.isnan(road_durations)
+            & (road_distances > self.SPARSE_MIN_SAMPLE_DISTANCE) & (road_distances < 999999)
+        )
+        if not sample.any():
+            return 1.0 / self.ROUTING_FALLBACK_SPEED
+        return float(np.median(road_durations[sample] / road_distances[sample]))
+
     def create_road_distance_matrix(self, locations):
-        """Créer la matrice de distance routière (inchangé)"""
+        """Créer la matrice de distance routière (int32, mètres)"""
+        return self.create_road_matrices(locations)[0]
+
+    def create_road_matrices(self, locations):
+        """Créer les matrices routières distances (mètres) et durées (secondes), int32
+
+        Les deux matrices proviennent des mêmes réponses du service de routage.
+        Les paires déjà connues sont servies par le cache persistant
+        (vrp.distance.cache), seules les paires manquantes sont demandées
+        au service de routage.
+
+        En mode sparse_knn, seuls les arcs vers les k plus proches voisins
+        sont calculés par la route; les autres sont estimés à partir de la
+        distance à vol d'oiseau multipliée par le détour médian observé.
+        Les matrices retournées sont toujours complètes (N x N).
+
+        Les durées manquantes (repli à vol d'oiseau, backend sans durées)
+        sont estimées avec l'allure médiane des arcs routiers connus.
+        """
         settings = self._get_company_settings()
         service_name = settings['routing_service']
         
@@ -125,173 +392,372 @@ class VRPOptimizerEnhanced(models.TransientModel):
         
         if service_name not in self.ROUTING_SERVICES:
             _logger.warning(f"Service {service_name} non supporté, fallback euclidien")
-            return self._create_euclidean_matrix(locations)
+            return self._create_euclidean_matrices(locations)
         
         try:
-            if service_name == 'osrm':
-                distance_matrix, duration_matrix = self._get_osrm_matrix(locations)
+            # Cache partagé, en lecture seule pour les utilisateurs: écritures en superutilisateur
+            cache = self.env['vrp.distance.cache'].sudo()
+            keys = [cache._coordinate_key(loc['lat'], loc['lng']) for loc in locations]
+
+            size = len(locations)
+            distance_matrix = np.full((size, size), np.nan)
+            duration_matrix = np.full((size, size), np.nan)
+
+            # Paires connues de la dernière matrice du contexte: seuls les
+            # nouveaux nœuds (lignes et colonnes) restent à obtenir
+            store_context = self._matrix_store_context(settings)
+            known = matrix_store.prefill(store_context, keys, distance_matrix, duration_matrix)
+            new_keys = None
+            if known.any():
+                new_keys = [key for key, is_known in zip(keys, known.tolist()) if not is_known]
+                _logger.info(f"Matrice du contexte: {int(known.sum())} nœuds connus, {len(new_keys)} nouveaux")
+
+            # Le service principal prime sur le service de couverture; les
+            # backends locaux (fichier de la société) ne passent pas par la base
+            cached_pairs = {}
+            for cached_service in filter(routing_backends.is_persisted, [settings.get('hedge_service'), service_name]):
+                cached_pairs.update(cache._lookup_pairs(cached_service, keys, new_keys=new_keys))
+
+            # Positions de chaque clé (plusieurs commandes peuvent partager une adresse)
+            key_positions = {}
+            for index, key in enumerate(keys):
+                key_positions.setdefault(key, []).append(index)
+
+            for positions in key_positions.values():
+                distance_matrix[np.ix_(positions, positions)] = 0.0
+                duration_matrix[np.ix_(positions, positions)] = 0.0
+            for (origin, destination), (distance, duration) in cached_pairs.items():
+                block = np.ix_(key_positions[origin], key_positions[destination])
+                distance_matrix[block] = distance
+                duration_matrix[block] = np.nan if duration is None else duration
+
+            neighbors = settings.get('matrix_knn') or 0
+            sparse = settings.get('matrix_mode') == 'sparse_knn' and 0 < neighbors < size - 1
+            haversine = None
+            if sparse:
+                haversine = self._create_euclidean_matrix(locations)
+                arc_mask = self._knn_arc_mask(haversine, neighbors)
+                missing_pairs = np.argwhere(np.isnan(distance_matrix) & arc_mask)
+                requested = int(arc_mask.sum())
+                _logger.info(f"Mode sparse: {requested} arcs routiers sur {size * (size - 1)} (k={neighbors})")
             else:
-                _logger.info(f"Service {service_name} non implémenté, utilisation OSRM")
-                distance_matrix, duration_matrix = self._get_osrm_matrix(locations)
-            
-            if distance_matrix is None:
-                _logger.warning("Calcul distance routière échoué, utilisation fallback euclidien")
-                return self._create_euclidean_matrix(locations)
+                missing_pairs = np.argwhere(np.isnan(distance_matrix))
+                requested = size * (size - 1)
+
+            _logger.info(
+                f"Cache distances: {requested - len(missing_pairs)} paires servies, "
+                f"{len(missing_pairs)} à calculer"
+            )
+
+            # Paires complétées à vol d'oiseau (non conservées dans le contexte)
+            estimated = np.zeros((size, size), dtype=bool)
+            if len(missing_pairs):
+                fetched = self._fetch_missing_road_pairs(settings, locations, missing_pairs, sparse=sparse)
+
+                if fetched is None:
+                    if len(missing_pairs) == requested:
+                        _logger.warning("Calcul distance routière échoué, utilisation fallback euclidien")
+                        return self._create_euclidean_matrices(locations)
+                    if not sparse:
+                        # Compléter les paires manquantes par la distance à vol d'oiseau
+                        fallback = self._create_euclidean_matrix(locations)
+                        estimated = np.isnan(distance_matrix)
+                        distance_matrix[estimated] = fallback[estimated]
+                else:
+                    sources, destinations, distances, durations, answered_by, services = fetched
+                    fetched_mask = answered_by >= 0
+                    block = np.ix_(sources, destinations)
+                    missing_block = np.isnan(distance_matrix[block])
+                    reachable = missing_block & fetched_mask & ~np.isnan(distances)
+
+                    # Mise en cache sous le nom du service ayant répondu
+                    pairs_by_service = {}
+                    rows, cols = np.nonzero(reachable)
+                    for r, c in zip(rows.tolist(), cols.tolist()):
+                        origin, destination = keys[sources[r]], keys[destinations[c]]
+                        pairs_by_service.setdefault(services[answered_by[r, c]], {})[(origin, destination)] = (
+                            origin, destination, float(distances[r, c]), float(durations[r, c])
+                        )
+                    for answered_service, pairs in pairs_by_service.items():
+                        if routing_backends.is_persisted(answered_service):
+                            cache._store_pairs(answered_service, list(pairs.values()))
+
+                    # Paires injoignables par la route; en mode dense, repli
+                    # à vol d'oiseau pour les tuiles en échec
+                    unreachable = fetched_mask & np.isnan(distances)
+                    distances = np.where(unreachable, 999999, distances)
+                    durations = np.where(unreachable, 999999, durations)
+                    if not sparse and not fetched_mask.all():
+                        fallback = geo.haversine_block(
+                            [locations[i]['lat'] for i in sources], [locations[i]['lng'] for i in sources],
+                            [locations[j]['lat'] for j in destinations], [locations[j]['lng'] for j in destinations]
+                        )
+                        distances = np.where(fetched_mask, distances, fallback)
+                        estimated[block] = missing_block & ~fetched_mask
+                    distance_matrix[block] = np.where(missing_block, distances, distance_matrix[block])
+                    duration_matrix[block] = np.where(missing_block, durations, duration_matrix[block])
+
+            matrix_store.update(
+                store_context, keys,
+                np.where(estimated, np.nan, distance_matrix), np.where(estimated, np.nan, duration_matrix)
+            )
+
+            if sparse:
+                # Arcs non calculés: vol d'oiseau x détour médian des arcs routiers
+                detour_factor = self._estimate_detour_factor(distance_matrix, haversine)
+                missing = np.isnan(distance_matrix)
+                distance_matrix[missing] = haversine[missing] * detour_factor
+                _logger.info(f"Mode sparse: {int(missing.sum())} paires estimées (détour x{detour_factor:.2f})")
+
+            # Durées sans mesure routière: distance x allure médiane observée
+            missing_durations = np.isnan(duration_matrix)
+            if missing_durations.any():
+                pace = self._estimate_pace(distance_matrix, duration_matrix)
+                duration_matrix[missing_durations] = distance_matrix[missing_durations] * pace
             
-            # Convertir en entiers (mètres) pour OR-Tools
-            int_matrix = []
-            for row in distance_matrix:
-                int_row = [int(distance) if distance is not None else 999999 for distance in row]
-                int_matrix.append(int_row)
+            # Convertir en entiers (mètres / secondes) pour OR-Tools
+            int_matrix = distance_matrix.astype(np.int32)
+            int_durations = duration_matrix.astype(np.int32)
             
             _logger.info(f"Matrice distance routière créée avec succès")
-            return int_matrix
+            return int_matrix, int_durations
             
         except Exception as e:
             _logger.error(f"Erreur création matrice distance routière: {str(e)}")
-            return self._create_euclidean_matrix(locations)
+            return self._create_euclidean_matrices(locations)
+
+    def _matrix_store_context(self, settings):
+        """Contexte de planification des matrices conservées en mémoire:
+        base, société, jour et sources des distances routières"""
+        return (
+            self.env.cr.dbname,
+            self.env.company.id,
+            fields.Date.context_today(self),
+            settings['routing_service'],
+            settings.get('hedge_service'),
+            settings.get('local_matrix_path'),
+            settings.get('road_graph_path'),
+        )
 
     def _create_euclidean_matrix(self, locations):
-        """Fallback vers la distance euclidienne (inchangé)"""
+        """Fallback vers la distance à vol d'oiseau (matrice int32 vectorisée)"""
         _logger.info("Utilisation distance euclidienne comme fallback")
-        matrix = []
-        for i, from_loc in enumerate(locations):
-            row = []
-            for j, to_loc in enumerate(locations):
-                if i == j:
-                    row.append(0)
-                else:
-                    distance = self._calculate_euclidean_distance(
-                        from_loc['lat'], from_loc['lng'],
-                        to_loc['lat'], to_loc['lng']
-                    )
-                    row.append(int(distance))
-            matrix.append(row)
-        return matrix
+        return geo.location_matrix(locations)
 
-    def solve_vrp_with_driver_based_depots(self, sale_orders, vehicles):
-        """MODIFIÉ: Résolution VRP avec dépôts basés sur les chauffeurs"""
+    def _create_euclidean_matrices(self, locations):
+        """Fallback distances à vol d'oiseau et durées à vitesse moyenne (int32)"""
+        matrix = self._create_euclidean_matrix(locations)
+        return matrix, (matrix / self.ROUTING_FALLBACK_SPEED).astype(np.int32)
+
+    def _build_problem(self, sale_orders, vehicles):
+        """Problème VRP sans ORM (tools.problem) construit en une passe
+
+        Les libellés des véhicules et chauffeurs sont lus en une seule
+        lecture groupée, les coordonnées des commandes résolues en une fois
+        (sale.order._resolve_coordinates); les véhicules sans chauffeur
+        géolocalisé et les commandes sans coordonnées sont écartés.
+        """
+        # Les appelants historiques passent une liste de véhicules
+        vehicles = self.env['fleet.vehicle'].browse([vehicle.id for vehicle in vehicles])
+        vehicle_rows = {row['id']: row for row in vehicles.read(['name', 'driver_id'])}
+        depots = vehicles._get_vrp_depot_coordinates()
+        specs = []
+        for vehicle in vehicles:
+            row = vehicle_rows[vehicle.id]
+            if not row['driver_id'] or not depots[vehicle.id]:
+                _logger.warning(f"✗ Véhicule {row['name']} ignoré - pas de coordonnées chauffeur")
+                continue
+            lat, lng = depots[vehicle.id]
+            specs.append(problem.VehicleSpec(vehicle.id, row['name'], row['driver_id'][1], lat, lng))
+        
+        order_lats, order_lngs, missing = sale_orders._resolve_coordinates()
+        order_rows = sale_orders.read(['name'])
+        if profiling.verbose():
+            for row, is_missing in zip(order_rows, missing):
+                if is_missing:
+                    _logger.warning(f"✗ Commande {row['name']} ignorée - pas de coordonnées")
+        kept = [row for row, is_missing in zip(order_rows, missing) if not is_missing]
+        
+        return problem.VRPProblem(
+            [row['id'] for row in kept], [row['name'] for row in kept],
+            order_lats[~missing], order_lngs[~missing], specs
+        )
+
+    def solve_vrp_with_driver_based_depots(self, sale_orders, vehicles, initial_routes=None):
+        """MODIFIÉ: Résolution VRP avec dépôts basés sur les chauffeurs
+
+        initial_routes ({vehicle_id: [ids des commandes]}, ex: tournées d'une
+        session précédente) amorce la recherche (démarrage à chaud).
+        """
         _logger.info(f"=== VRP AVEC DÉPÔTS PAR CHAUFFEUR ===")
         _logger.info(f"Commandes à traiter: {len(sale_orders)}")
         _logger.info(f"Véhicules disponibles: {len(vehicles)}")
         
-        # Vérifier que tous les véhicules ont des chauffeurs avec coordonnées
-        valid_vehicles = []
-        for vehicle in vehicles:
-            lat, lng, coords_found = self._get_driver_coordinates(vehicle)
-            if coords_found:
-                valid_vehicles.append({
-                    'vehicle': vehicle,
-                    'driver_lat': lat,
-                    'driver_lng': lng
-                })
-                _logger.info(f"✓ Véhicule {vehicle.name} - Chauffeur: {vehicle.driver_id.name} ({lat}, {lng})")
-            else:
-                _logger.warning(f"✗ Véhicule {vehicle.name} ignoré - pas de coordonnées chauffeur")
+        with profiling.span('problem') as stage:
+            vrp_problem = self._build_problem(sale_orders, vehicles)
+            stage.update(orders=vrp_problem.num_orders, vehicles=vrp_problem.num_vehicles)
         
-        if not valid_vehicles:
+        if not vrp_problem.num_vehicles:
             raise UserError("Aucun véhicule avec chauffeur géolocalisé disponible")
+        if not vrp_problem.num_orders:
+            raise UserError("Aucune commande avec coordonnées GPS valides")
         
-        _logger.info(f"Véhicules valides: {len(valid_vehicles)}")
-        
-        # Préparer les commandes valides
-        valid_orders = []
-        for order in sale_orders:
-            lat, lng, coords_found = order._get_order_coordinates_unified(order)
-            
-            if coords_found:
-                valid_orders.append({
-                    'order': order,
-                    'lat': lat,
-                    'lng': lng
-                })
-                _logger.info(f"✓ Commande {order.name}: {lat}, {lng}")
+        _logger.info(f"Véhicules valides: {vrp_problem.num_vehicles}, commandes valides: {vrp_problem.num_orders}")
+        self._report_progress(
+            'coordinates',
+            f"{vrp_problem.num_orders} commandes géolocalisées, {vrp_problem.num_vehicles} véhicules",
+            force=True
+        )
+        return self._solve_problem(vrp_problem, initial_routes)
+
+    def _solve_problem(self, vrp_problem, initial_routes=None):
+        """Choix du moteur selon la configuration société, repli par proximité"""
+        settings = self._get_company_settings()
+        if settings['optimization_engine'] == 'ortools':
+            if (settings['decomposition_mode'] != 'none' and vrp_problem.num_vehicles > 1
+                    and vrp_problem.num_orders > settings['cluster_max_orders']):
+                with profiling.span('ortools_clusters'):
+                    result = self._solve_decomposed_ortools(vrp_problem, initial_routes)
             else:
-                _logger.warning(f"✗ Commande {order.name} ignorée - pas de coordonnées")
-        
-        if not valid_orders:
-            raise UserError("Aucune commande avec coordonnées GPS valides")
+                with profiling.span('ortools'):
+                    result = self._solve_multi_depot_ortools(vrp_problem, initial_routes)
+            if result:
+                return result
+            _logger.warning("OR-Tools sans solution, repli sur l'assignation par proximité")
         
-        # NOUVEAU ALGORITHME: Assignation par proximité géographique
-        return self._assign_orders_to_nearest_drivers(valid_orders, valid_vehicles)
+        # Assignation par proximité géographique
+        with profiling.span('proximity'):
+            return self._assign_orders_to_nearest_drivers(vrp_problem, initial_routes)
 
-    def _assign_orders_to_nearest_drivers(self, valid_orders, valid_vehicles):
+    def _assign_orders_to_nearest_drivers(self, vrp_problem, initial_routes=None):
         """NOUVEAU: Assigner les commandes aux chauffeurs les plus proches"""
         _logger.info("=== ASSIGNATION PAR PROXIMITÉ GÉOGRAPHIQUE ===")
         
+        # Index spatial des dépôts chauffeurs, construit une fois par optimisation
+        depot_index = spatial.NearestIndex(vrp_problem.depot_lats, vrp_problem.depot_lngs)
+        nearest_indexes, nearest_distances = depot_index.query(vrp_problem.order_lats, vrp_problem.order_lngs)
+        nearest_distances = nearest_distances.astype(np.int64)
+        
+        # Regrouper les commandes par chauffeur le plus proche (tri stable:
+        # l'ordre des commandes est conservé dans chaque tournée)
+        by_vehicle = np.argsort(nearest_indexes, kind='stable')
+        vehicle_indexes, starts = np.unique(nearest_indexes[by_vehicle], return_index=True)
+        
+        # Sous-problème limité aux véhicules utilisés (dépôts des matrices)
+        vehicle_indexes = vehicle_indexes.tolist()
+        used_problem = vrp_problem.subset(np.arange(vrp_problem.num_orders), vehicle_indexes)
+        
         routes = {}
         route_stats = {}
-        
-        # Pour chaque commande, trouver le chauffeur le plus proche
-        for order_data in valid_orders:
-            order = order_data['order']
-            order_lat = order_data['lat']
-            order_lng = order_data['lng']
+        for used_index, members in enumerate(np.split(by_vehicle, starts[1:])):
+            vehicle = used_problem.vehicles[used_index]
+            routes[vehicle.vehicle_id] = vrp_problem.order_ids[members].tolist()
+            route_stats[vehicle.vehicle_id] = used_problem.route_stats(
+                used_index, len(members), nearest_distances[members].sum()
+            )
             
-            min_distance = float('inf')
-            closest_vehicle = None
-            
-            # Calculer la distance vers chaque chauffeur
-            for vehicle_data in valid_vehicles:
-                vehicle = vehicle_data['vehicle']
-                driver_lat = vehicle_data['driver_lat']
-                driver_lng = vehicle_data['driver_lng']
-                
-                # Distance euclidienne (rapide pour la sélection initiale)
-                distance = self._calculate_euclidean_distance(
-                    order_lat, order_lng, 
-                    driver_lat, driver_lng
-                )
-                
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_vehicle = vehicle
-            
-            # Assigner la commande au véhicule le plus proche
-            if closest_vehicle:
-                vehicle_id = closest_vehicle.id
-                if vehicle_id not in routes:
-                    routes[vehicle_id] = []
-                    route_stats[vehicle_id] = {
-                        'distance': 0,
-                        'stops': 0,
-                        'vehicle_name': closest_vehicle.name,
-                        'driver': closest_vehicle.driver_id.name,
-                        'driver_coords': (
-                            next(v['driver_lat'] for v in valid_vehicles if v['vehicle'] == closest_vehicle),
-                            next(v['driver_lng'] for v in valid_vehicles if v['vehicle'] == closest_vehicle)
-                        )
-                    }
-                
-                routes[vehicle_id].append(order.id)
-                route_stats[vehicle_id]['stops'] += 1
-                route_stats[vehicle_id]['distance'] += min_distance
-                
-                _logger.info(f"✅ {order.name} → {closest_vehicle.name} (distance: {min_distance/1000:.2f}km)")
+            if _logger.isEnabledFor(logging.DEBUG):
+                for i in members.tolist():
+                    _logger.debug(
+                        f"{vrp_problem.order_names[i]} → {vehicle.name} "
+                        f"(distance: {nearest_distances[i]/1000:.2f}km)"
+                    )
+        
+        # Matrices routières (dépôts utilisés + commandes) calculées une seule fois
+        matrices = self._build_route_matrices(used_problem)
         
         # Optimiser l'ordre des arrêts pour chaque véhicule
-        optimized_routes = self._optimize_stops_order_per_vehicle(routes, route_stats, valid_orders)
+        self._report_progress('solver', f"Séquençage de {len(routes)} tournées", force=True)
+        with profiling.span('sequencing', routes=len(routes)):
+            optimized_routes = self._optimize_stops_order_per_vehicle(routes, route_stats, matrices, initial_routes)
         
+        return self._build_optimization_result(optimized_routes, route_stats, matrices, 'driver_proximity_based')
+
+    def _build_optimization_result(self, routes, route_stats, matrices, algorithm):
+        """Résultat commun aux moteurs: ETAs, distances routières et totaux"""
+        # Distances et durées routières des tournées
+        etas, depot_distances = self._compute_route_timings(routes, route_stats, matrices)
+        return self._summarize_optimization_result(routes, route_stats, etas, depot_distances, algorithm)
+
+    def _summarize_optimization_result(self, routes, route_stats, etas, depot_distances, algorithm):
+        """Totaux et dict de résultat standard à partir des tournées chronométrées"""
         total_distance = sum(stats['distance'] for stats in route_stats.values())
+        total_duration = sum(stats.get('duration', 0) for stats in route_stats.values())
         total_stops = sum(len(order_ids) for order_ids in routes.values())
         
         _logger.info(f"=== RÉSULTAT ASSIGNATION ===")
         _logger.info(f"Véhicules utilisés: {len(routes)}")
         _logger.info(f"Commandes assignées: {total_stops}")
-        _logger.info(f"Distance totale approximative: {total_distance/1000:.2f}km")
+        _logger.info(f"Distance totale routière: {total_distance/1000:.2f}km, durée totale: {total_duration/60:.0f}min")
         
         return {
-            'routes': optimized_routes,
+            'routes': routes,
             'stats': route_stats,
             'total_distance': total_distance,
+            'total_duration': total_duration,
             'total_stops': total_stops,
-            'algorithm': 'driver_proximity_based'
+            'etas': etas,
+            'depot_distances': depot_distances,
+            'algorithm': algorithm
+        }
+
+    def _build_route_matrices(self, vrp_problem):
+        """Matrices routières distances / durées sur les nœuds du problème
+
+        Les dépôts occupent les premières positions (convention tools.problem).
+        Retourne un dict: 'depots' et 'orders' (id → position dans les matrices),
+        'distances' (m) et 'durations' (s).
+        """
+        num_vehicles = vrp_problem.num_vehicles
+        with profiling.span('matrix', nodes=num_vehicles + vrp_problem.num_orders):
+            distances, durations = (
+                self.create_road_matrices(vrp_problem.locations()) if num_vehicles else (None, None)
+            )
+        return {
+            'depots': dict(zip(vrp_problem.vehicle_ids.tolist(), range(num_vehicles))),
+            'orders': dict(zip(vrp_problem.order_ids.tolist(), range(num_vehicles, num_vehicles + vrp_problem.num_orders))),
+            'distances': distances,
+            'durations': durations,
         }
 
-    def _optimize_stops_order_per_vehicle(self, routes, route_stats, valid_orders):
-        """NOUVEAU: Optimiser l'ordre des arrêts pour chaque véhicule"""
+    def _compute_route_timings(self, routes, route_stats, matrices):
+        """Distances et heures d'arrivée par arrêt à partir des matrices routières
+
+        Les arrivées sont les sommes cumulées des durées des tronçons.
+        Met à jour route_stats (distance en m, duration en s, retour au
+        dépôt compris) et retourne (etas en minutes, distances depuis le
+        dépôt en km) par commande.
+        """
+        distances, durations = matrices['distances'], matrices['durations']
+        etas = {}
+        depot_distances = {}
+        for vehicle_id, order_ids in routes.items():
+            if not order_ids:
+                continue
+            depot = matrices['depots'][vehicle_id]
+            stops = np.array([matrices['orders'][order_id] for order_id in order_ids])
+            path = np.concatenate(([depot], stops, [depot]))
+
+            leg_distances = distances[path[:-1], path[1:]].astype(np.int64)
+            arrivals = np.cumsum(durations[path[:-1], path[1:]].astype(np.int64))
+
+            route_stats[vehicle_id]['distance'] = int(leg_distances.sum())
+            route_stats[vehicle_id]['duration'] = int(arrivals[-1])
+            etas.update(zip(order_ids, (arrivals[:-1] / 60.0).tolist()))
+            depot_distances.update(zip(order_ids, (distances[depot, stops] / 1000.0).tolist()))
+
+        return etas, depot_distances
+
+    def _optimize_stops_order_per_vehicle(self, routes, route_stats, matrices, initial_routes=None):
+        """Optimiser l'ordre des arrêts de chaque véhicule sur la matrice routière
+
+        Plus proche voisin puis 2-opt / Or-opt (tools.sequencing), dans la
+        limite de SEQUENCING_TIME_BUDGET secondes par tournée. L'ordre de la
+        tournée initiale du véhicule, s'il est fourni, sert de point de départ
+        quand il est moins coûteux.
+        """
+        initial_routes = initial_routes or {}
         optimized_routes = {}
-        orders_dict = {order_data['order'].id: order_data for order_data in valid_orders}
         
         for vehicle_id, order_ids in routes.items():
             if len(order_ids) <= 2:
@@ -299,63 +765,285 @@ class VRPOptimizerEnhanced(models.TransientModel):
                 optimized_routes[vehicle_id] = order_ids
                 continue
             
-            # Récupérer les coordonnées du chauffeur
-            driver_coords = route_stats[vehicle_id]['driver_coords']
+            # Sous-matrice départ chauffeur + clients de la tournée
+            nodes = [matrices['depots'][vehicle_id]] + [matrices['orders'][order_id] for order_id in order_ids]
+            matrix = matrices['distances'][np.ix_(nodes, nodes)]
             
-            # Créer la liste des points (chauffeur + clients)
-            points = [{'lat': driver_coords[0], 'lng': driver_coords[1], 'type': 'driver'}]
+            positions = {order_id: index for index, order_id in enumerate(order_ids, start=1)}
+            initial = [positions[order_id] for order_id in initial_routes.get(vehicle_id, []) if order_id in positions]
+            sequence = sequencing.sequence_route(
+                matrix, time_budget=self.SEQUENCING_TIME_BUDGET, initial=initial
+            )
+            optimized_routes[vehicle_id] = [order_ids[node - 1] for node in sequence]
             
-            for order_id in order_ids:
-                order_data = orders_dict[order_id]
-                points.append({
-                    'lat': order_data['lat'],
-                    'lng': order_data['lng'],
-                    'order_id': order_id,
-                    'type': 'customer'
-                })
-            
-            # Algorithme du plus proche voisin pour optimiser l'ordre
-            optimized_order = self._nearest_neighbor_tsp(points, driver_coords)
-            optimized_routes[vehicle_id] = optimized_order
-            
-            _logger.info(f"Ordre optimisé pour {route_stats[vehicle_id]['vehicle_name']}: {len(optimized_order)} arrêts")
+            if profiling.verbose():
+                _logger.info(f"Ordre optimisé pour {route_stats[vehicle_id]['vehicle_name']}: {len(sequence)} arrêts")
         
         return optimized_routes
 
-    def _nearest_neighbor_tsp(self, points, start_coords):
-        """Algorithme du plus proche voisin pour optimiser l'ordre des arrêts"""
-        if len(points) <= 2:
-            return [p['order_id'] for p in points if p['type'] == 'customer']
+    def _solve_multi_depot_ortools(self, vrp_problem, initial_routes=None):
+        """Résolution OR-Tools multi-dépôts: chaque véhicule part et revient chez son chauffeur
+
+        Assignation et séquençage sont résolus ensemble (Guided Local Search,
+        limite de temps société), sous les contraintes vrp_max_route_distance
+        et vrp_max_stops_per_route. Les commandes impossibles à servir sont
+        écartées (disjonctions) plutôt que de rendre le problème infaisable.
+        La recherche s'arrête aussi après vrp_solver_plateau_time secondes
+        sans amélioration; l'historique des solutions améliorantes est
+        retourné dans 'solution_history'. initial_routes amorce la recherche.
+        Retourne None si aucune solution n'est trouvée.
+        """
+        _logger.info("=== RÉSOLUTION OR-TOOLS MULTI-DÉPÔTS ===")
+        settings = self._get_company_settings()
         
-        # Commencer par le point de départ (chauffeur)
-        current_pos = start_coords
-        unvisited = [p for p in points if p['type'] == 'customer']
-        ordered_stops = []
+        matrices = self._build_route_matrices(vrp_problem)
+        with profiling.span('search', nodes=len(matrices['distances'])):
+            outcome = multi_depot.solve(
+                matrices['distances'],
+                vrp_problem.num_vehicles,
+                # Distance maximale par véhicule (km → m)
+                int(settings['max_route_distance'] or 1000) * 1000,
+                int(settings['max_stops_per_route'] or 100),
+                int(settings['solver_time_limit'] or 30),
+                plateau_seconds=settings['solver_plateau_time'],
+                on_improvement=lambda entry: self._report_progress(
+                    'solver', f"Solveur: coût {entry['cost']} après {entry['time']:.0f}s", **entry
+                ),
+                initial_routes=self._initial_route_nodes(vrp_problem, matrices, initial_routes),
+            )
+        if not outcome:
+            return None
+        _logger.info(
+            f"OR-Tools: résolution en {outcome['elapsed']:.1f}s, "
+            f"{len(outcome['history'])} solutions améliorantes"
+            + (" (arrêt sur plateau)" if outcome['stopped_on_plateau'] else "")
+            + (" (démarrage à chaud)" if outcome['warm_started'] else "")
+        )
         
-        while unvisited:
-            # Trouver le client le plus proche
-            min_distance = float('inf')
-            closest_customer = None
-            
-            for customer in unvisited:
-                distance = self._calculate_euclidean_distance(
-                    current_pos[0], current_pos[1],
-                    customer['lat'], customer['lng']
-                )
-                
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_customer = customer
+        routes, route_stats, dropped = self._read_multi_depot_outcome(outcome, vrp_problem)
+        if dropped:
+            _logger.warning(f"OR-Tools: {len(dropped)} commandes non servies (contraintes distance/arrêts)")
+        
+        result = self._build_optimization_result(routes, route_stats, matrices, 'ortools_multi_depot')
+        result['dropped_order_ids'] = dropped
+        result['solution_history'] = outcome['history']
+        return result
+
+    def _initial_route_nodes(self, vrp_problem, matrices, initial_routes):
+        """Tournées initiales en nœuds des matrices, par véhicule du problème
+
+        Les commandes absentes du problème sont ignorées, une commande
+        présente dans plusieurs tournées n'est gardée que dans la première.
+        """
+        if not initial_routes:
+            return None
+        seen = set()
+        nodes = []
+        for vehicle in vrp_problem.vehicles:
+            route = []
+            for order_id in initial_routes.get(vehicle.vehicle_id, []):
+                if order_id in matrices['orders'] and order_id not in seen:
+                    seen.add(order_id)
+                    route.append(matrices['orders'][order_id])
+            nodes.append(route)
+        return nodes if seen else None
+
+    def _read_multi_depot_outcome(self, outcome, vrp_problem):
+        """Tournées (ids de commandes par véhicule), statistiques et commandes écartées
+        à partir des nœuds retournés par multi_depot.solve"""
+        routes = {}
+        route_stats = {}
+        for vehicle_index, nodes in enumerate(outcome['routes']):
+            if not nodes:
+                continue
+            vehicle_id = vrp_problem.vehicles[vehicle_index].vehicle_id
+            routes[vehicle_id] = vrp_problem.node_order_ids(nodes)
+            route_stats[vehicle_id] = vrp_problem.route_stats(vehicle_index, len(nodes))
+        dropped = vrp_problem.node_order_ids(outcome['dropped'])
+        return routes, route_stats, dropped
+
+    def _decomposition_workers(self, settings, num_clusters):
+        """Processus de résolution des clusters: 1 (séquentiel) sauf option société
+
+        Le fork n'est utilisé que dans un worker du serveur multi-processus
+        (--workers > 0) sans autre thread actif: en mode threadé, un autre
+        thread peut détenir un verrou (logging, pool de connexions) que
+        l'enfant hériterait verrouillé.
+        """
+        if not settings['parallel_clusters'] or not config['workers'] or not decomposition.fork_safe():
+            return 1
+        return decomposition.worker_count(num_clusters, self.DECOMPOSITION_MAX_WORKERS)
+
+    def _solve_decomposed_ortools(self, vrp_problem, initial_routes=None):
+        """Décomposition « cluster first, route second » pour les grandes journées
+
+        Les commandes sont partagées en clusters d'au plus vrp_cluster_max_orders
+        commandes (balayage angulaire ou k-means capacitaire amorcé sur les
+        dépôts), les véhicules répartis entre les clusters selon leur capacité
+        en arrêts. Chaque cluster est résolu par OR-Tools dans un processus
+        séparé si l'option société le permet (voir _decomposition_workers),
+        sinon l'un après l'autre, sur ses propres matrices; les résultats sont
+        fusionnés dans le dict de résultat standard.
+        """
+        settings = self._get_company_settings()
+        max_stops = int(settings['max_stops_per_route'] or 100)
+        order_lats, order_lngs = vrp_problem.order_lats, vrp_problem.order_lngs
+        depot_lats, depot_lngs = vrp_problem.depot_lats, vrp_problem.depot_lngs
+        
+        clusters = decomposition.cluster_count(
+            vrp_problem.num_orders, vrp_problem.num_vehicles, settings['cluster_max_orders']
+        )
+        if settings['decomposition_mode'] == 'sweep':
+            labels = decomposition.sweep_partition(order_lats, order_lngs, depot_lats, depot_lngs, clusters)
+        else:
+            capacity = max(settings['cluster_max_orders'], math.ceil(vrp_problem.num_orders / clusters))
+            labels = decomposition.capacitated_kmeans(
+                order_lats, order_lngs, depot_lats, depot_lngs, clusters, capacity
+            )
+        # Numérotation contiguë (un cluster k-means peut rester vide)
+        labels = np.unique(labels, return_inverse=True)[1]
+        depot_labels = decomposition.assign_depots(
+            order_lats, order_lngs, labels, depot_lats, depot_lngs, max_stops
+        )
+        
+        # Le temps de calcul société reste la durée totale: partagé entre les
+        # vagues de clusters quand il y a moins de processus que de clusters
+        num_clusters = int(labels.max()) + 1
+        workers = self._decomposition_workers(settings, num_clusters)
+        waves = math.ceil(num_clusters / workers)
+        time_limit = max(1, int(settings['solver_time_limit'] or 30) // waves)
+        
+        # Matrices et tâches par cluster (les processus ne reçoivent que des tableaux)
+        parts = []
+        tasks = []
+        for cluster in range(num_clusters):
+            cluster_problem = vrp_problem.subset(
+                np.flatnonzero(labels == cluster), np.flatnonzero(depot_labels == cluster).tolist()
+            )
+            matrices = self._build_route_matrices(cluster_problem)
+            parts.append((cluster_problem, matrices))
+            tasks.append({
+                'distances': matrices['distances'],
+                'num_vehicles': cluster_problem.num_vehicles,
+                'max_distance': int(settings['max_route_distance'] or 1000) * 1000,
+                'max_stops': max_stops,
+                'time_limit': time_limit,
+                'plateau_seconds': settings['solver_plateau_time'],
+                'initial_routes': self._initial_route_nodes(cluster_problem, matrices, initial_routes),
+            })
+            _logger.info(
+                f"Cluster {cluster}: {cluster_problem.num_orders} commandes, {cluster_problem.num_vehicles} véhicules"
+            )
+        
+        routes, route_stats, etas, depot_distances = {}, {}, {}, {}
+        dropped = []
+        history = []
+        solved = 0
+        for index, outcome in decomposition.solve_clusters(tasks, workers):
+            cluster_problem, matrices = parts[index]
+            solved += 1
+            self._report_progress(
+                'solver', f"Clusters résolus: {solved}/{len(tasks)}",
+                done=solved, total=len(tasks), force=solved == len(tasks)
+            )
+            if not outcome:
+                _logger.warning(f"OR-Tools: cluster {index} sans solution, commandes non servies")
+                dropped.extend(cluster_problem.order_ids.tolist())
+                continue
             
-            # Ajouter le client le plus proche
-            if closest_customer:
-                ordered_stops.append(closest_customer['order_id'])
-                current_pos = (closest_customer['lat'], closest_customer['lng'])
-                unvisited.remove(closest_customer)
+            cluster_routes, cluster_stats, cluster_dropped = self._read_multi_depot_outcome(
+                outcome, cluster_problem
+            )
+            cluster_etas, cluster_depot_distances = self._compute_route_timings(cluster_routes, cluster_stats, matrices)
+            routes.update(cluster_routes)
+            route_stats.update(cluster_stats)
+            etas.update(cluster_etas)
+            depot_distances.update(cluster_depot_distances)
+            dropped.extend(cluster_dropped)
+            history.extend(dict(entry, cluster=index) for entry in outcome['history'])
+        
+        if dropped:
+            _logger.warning(f"OR-Tools: {len(dropped)} commandes non servies (contraintes distance/arrêts)")
+        
+        result = self._summarize_optimization_result(
+            routes, route_stats, etas, depot_distances, f"ortools_{settings['decomposition_mode']}_clusters"
+        )
+        result['dropped_order_ids'] = dropped
+        result['solution_history'] = history
+        return result
+
+    def insert_orders_into_routes(self, current_routes, new_orders, vehicles, frozen=None):
+        """Insérer de nouvelles commandes dans le plan de tournées existant
+
+        current_routes: {vehicle_id: [ids des commandes dans l'ordre de visite]},
+        frozen: {vehicle_id: nombre d'arrêts figés en tête de tournée}.
+        Les nouvelles commandes sont placées par insertion au moindre coût avec
+        regret (tools.insertion), sous les contraintes vrp_max_route_distance et
+        vrp_max_stops_per_route; les véhicules sans tournée peuvent en ouvrir une.
+        Les tournées dont un arrêt n'est pas géolocalisé sont laissées telles quelles.
+
+        Retourne un dict: 'routes' et 'stats' des seules tournées modifiées,
+        'etas' et 'depot_distances' de leurs commandes, 'unassigned_order_ids'.
+        """
+        settings = self._get_company_settings()
+        frozen = frozen or {}
+        planned_orders = self.env['sale.order'].browse(
+            [order_id for order_ids in current_routes.values() for order_id in order_ids]
+        )
+        vrp_problem = self._build_problem(planned_orders | new_orders, vehicles)
+        if not vrp_problem.num_vehicles:
+            raise UserError("Aucun véhicule avec chauffeur géolocalisé disponible")
         
-        return ordered_stops
+        matrices = self._build_route_matrices(vrp_problem)
+        nodes = matrices['orders']
+        new_ids = set(new_orders.ids)
+        candidates = [node for order_id, node in nodes.items() if order_id in new_ids]
+        
+        # Tournées candidates: véhicules géolocalisés dont tous les arrêts le sont aussi
+        route_vehicles, depots, routes, frozen_counts = [], [], [], []
+        for vehicle_index, vehicle in enumerate(vrp_problem.vehicles):
+            order_ids = current_routes.get(vehicle.vehicle_id, [])
+            if any(order_id not in nodes for order_id in order_ids):
+                _logger.warning(f"Tournée {vehicle.name} ignorée: arrêts sans coordonnées")
+                continue
+            route_vehicles.append(vehicle_index)
+            depots.append(vehicle_index)
+            routes.append([nodes[order_id] for order_id in order_ids])
+            frozen_counts.append(frozen.get(vehicle.vehicle_id, 0))
+        
+        new_routes, unassigned = insertion.regret_insertion(
+            matrices['distances'], depots, routes, candidates,
+            frozen=frozen_counts,
+            max_stops=int(settings['max_stops_per_route'] or 100),
+            max_distance=int(settings['max_route_distance'] or 1000) * 1000,
+        )
+        
+        changed_routes = {}
+        route_stats = {}
+        for vehicle_index, before, after in zip(route_vehicles, routes, new_routes):
+            if after == before:
+                continue
+            vehicle_id = vrp_problem.vehicles[vehicle_index].vehicle_id
+            changed_routes[vehicle_id] = vrp_problem.node_order_ids(after)
+            route_stats[vehicle_id] = vrp_problem.route_stats(vehicle_index, len(after))
+        
+        etas, depot_distances = self._compute_route_timings(changed_routes, route_stats, matrices)
+        unassigned_ids = vrp_problem.node_order_ids(unassigned) + [
+            order_id for order_id in new_orders.ids if order_id not in nodes
+        ]
+        _logger.info(
+            f"Insertion: {len(candidates) - len(unassigned)} commandes placées dans "
+            f"{len(changed_routes)} tournées, {len(unassigned_ids)} non placées"
+        )
+        return {
+            'routes': changed_routes,
+            'stats': route_stats,
+            'etas': etas,
+            'depot_distances': depot_distances,
+            'unassigned_order_ids': unassigned_ids,
+        }
 
     # Méthode de compatibilité - rediriger vers la nouvelle méthode
-    def solve_vrp_with_road_distances(self, sale_orders, vehicles):
+    def solve_vrp_with_road_distances(self, sale_orders, vehicles, initial_routes=None):
         """Redirection vers la nouvelle méthode basée sur les chauffeurs"""
-        return self.solve_vrp_with_driver_based_depots(sale_orders, vehicles)
\ No newline at end of file
+        return self.solve_vrp_with_driver_based_depots(sale_orders, vehicles, initial_routes)
\ No newline at end of file
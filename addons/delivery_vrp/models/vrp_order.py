@@ -161,18 +161,18 @@ class VrpOrder(models.Model):
             raise UserError("Les commandes de vente associées n'existent plus")
         
         context_with_flag = dict(self.env.context, from_optimization=True)
-        result = valid_sale_orders.with_context(context_with_flag).action_optimize_delivery_enhanced()
+        # Les VRP orders sont synchronisés par l'écriture groupée des résultats (sale.order._bulk_write_assignments)
+        return valid_sale_orders.with_context(context_with_flag).action_optimize_delivery_enhanced()
+
+    def action_insert_into_current_plan(self):
+        """Déléguer à la méthode sale.order"""
+        selected_orders = self.browse(self.env.context.get('active_ids', [])).exists() or self
         
-        # Synchronisation
-        for vrp_order in selected_vrp_orders:
-            if vrp_order.sale_order_id.exists():
-                sale_order = vrp_order.sale_order_id
-                vrp_order.with_context(from_optimization=True).write({
-                    'assigned_vehicle_id': sale_order.assigned_vehicle_id.id if sale_order.assigned_vehicle_id else False,
-                    'delivery_sequence': sale_order.delivery_sequence,
-                })
+        sale_orders = selected_orders.mapped('sale_order_id').exists()
+        if not sale_orders:
+            raise UserError("Aucune commande de vente associée trouvée")
         
-        return result
+        return sale_orders.with_context(active_ids=sale_orders.ids).action_insert_into_current_plan()
 
     def action_show_map(self):  
         """Déléguer à la méthode sale.order"""  
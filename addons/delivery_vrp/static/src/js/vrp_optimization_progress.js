@@ -0,0 +1,64 @@
+/** @odoo-module **/
+// static/src/js/vrp_optimization_progress.js
+
+import { registry } from '@web/core/registry';
+import { Component, useState, onWillUnmount } from '@odoo/owl';
+import { useService } from '@web/core/utils/hooks';
+
+// Durée d'affichage (ms) d'une session terminée avant de la retirer
+const FINISHED_DISPLAY_DELAY = 8000;
+
+export class VRPOptimizationProgress extends Component {
+    static template = 'delivery_vrp.VRPOptimizationProgress';
+    static props = {};
+
+    setup() {
+        this.busService = useService('bus_service');
+        this.state = useState({ sessions: {} });
+
+        this.onProgress = this.onProgress.bind(this);
+        this.busService.subscribe('vrp_optimization_progress', this.onProgress);
+        this.busService.start();
+
+        onWillUnmount(() => {
+            this.busService.unsubscribe('vrp_optimization_progress', this.onProgress);
+        });
+    }
+
+    onProgress(payload) {
+        this.state.sessions[payload.session_id] = payload;
+        if (payload.stage === 'done' || payload.stage === 'failed') {
+            setTimeout(() => {
+                delete this.state.sessions[payload.session_id];
+            }, FINISHED_DISPLAY_DELAY);
+        }
+    }
+
+    get sessions() {
+        return Object.values(this.state.sessions);
+    }
+
+    badgeClass(session) {
+        if (session.stage === 'done') {
+            return 'text-bg-success';
+        }
+        if (session.stage === 'failed') {
+            return 'text-bg-danger';
+        }
+        return 'text-bg-info';
+    }
+
+    iconClass(session) {
+        if (session.stage === 'done') {
+            return 'fa-check';
+        }
+        if (session.stage === 'failed') {
+            return 'fa-times';
+        }
+        return 'fa-spinner fa-spin';
+    }
+}
+
+registry.category('systray').add('delivery_vrp.optimization_progress', {
+    Component: VRPOptimizationProgress,
+}, { sequence: 40 });
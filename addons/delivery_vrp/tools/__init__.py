@@ -0,0 +1,13 @@
+from . import anytime
+from . import geo
+from . import routing_http
+from . import road_graph
+from . import matrix_store
+from . import routing_backends
+from . import sequencing
+from . import insertion
+from . import spatial
+from . import multi_depot
+from . import problem
+from . import decomposition
+from . import profiling
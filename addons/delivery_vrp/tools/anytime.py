@@ -0,0 +1,57 @@
+# tools/anytime.py - SUIVI DES SOLUTIONS OR-TOOLS (RÉSOLUTION « ANYTIME »)
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+class SolutionMonitor:
+    """Rappel de solution OR-Tools: historique des améliorations et arrêt sur plateau
+
+    history contient une entrée {'time': secondes, 'cost': coût} par solution
+    améliorante. Si plateau_seconds > 0, la recherche est arrêtée quand aucune
+    amélioration n'a été trouvée depuis ce délai; OR-Tools retourne alors la
+    meilleure solution connue. on_improvement(entry) est appelé à chaque
+    amélioration (ex: publication de la progression).
+    """
+
+    def __init__(self, routing, plateau_seconds=0, on_improvement=None):
+        self.routing = routing
+        self.plateau_seconds = plateau_seconds or 0
+        self.on_improvement = on_improvement
+        self.history = []
+        self.best_cost = None
+        self.stopped_on_plateau = False
+        self._started = None
+        self._last_improvement = None
+
+    def attach(self):
+        """Enregistrer le rappel auprès du modèle (avant SolveWithParameters)
+
+        Le modèle ne retient pas l'objet Python: l'appelant garde une
+        référence au moniteur jusqu'à la fin de la résolution.
+        """
+        self._started = self._last_improvement = time.monotonic()
+        self.routing.AddAtSolutionCallback(self)
+        return self
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self._started if self._started else 0.0
+
+    def __call__(self):
+        cost = self.routing.CostVar().Max()
+        now = time.monotonic()
+
+        if self.best_cost is None or cost < self.best_cost:
+            self.best_cost = cost
+            self._last_improvement = now
+            entry = {'time': round(now - self._started, 3), 'cost': int(cost)}
+            self.history.append(entry)
+            if self.on_improvement:
+                self.on_improvement(entry)
+        elif self.plateau_seconds and now - self._last_improvement >= self.plateau_seconds:
+            if not self.stopped_on_plateau:
+                self.stopped_on_plateau = True
+                _logger.info(f"OR-Tools: aucune amélioration depuis {self.plateau_seconds}s, arrêt de la recherche")
+                self.routing.solver().FinishCurrentSearch()
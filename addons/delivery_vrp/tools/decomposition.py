@@ -0,0 +1,182 @@
+# tools/decomposition.py - DÉCOMPOSITION « CLUSTER FIRST, ROUTE SECOND »
+import math
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from . import multi_depot
+from . import spatial
+
+# Itérations maximales du k-means capacitaire
+KMEANS_ITERATIONS = 20
+
+
+def cluster_count(num_orders, num_vehicles, max_orders):
+    """Nombre de clusters pour au plus max_orders commandes chacun (≤ un par véhicule)"""
+    return max(1, min(num_vehicles, math.ceil(num_orders / max(1, max_orders))))
+
+
+def sweep_partition(order_lats, order_lngs, depot_lats, depot_lngs, clusters):
+    """Balayage angulaire autour du barycentre des dépôts, en secteurs de taille égale
+
+    Le balayage commence au plus grand écart angulaire entre deux commandes
+    pour ne pas couper un groupe dense (une ville) entre le premier et le
+    dernier secteur. Retourne le numéro de cluster de chaque commande.
+    """
+    center_lat = float(np.mean(depot_lats))
+    center_lng = float(np.mean(depot_lngs))
+    x = (np.asarray(order_lngs) - center_lng) * math.cos(math.radians(center_lat))
+    y = np.asarray(order_lats) - center_lat
+    angles = np.arctan2(y, x)
+
+    order = np.argsort(angles, kind='stable')
+    sorted_angles = angles[order]
+    gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * math.pi))
+    order = np.roll(order, -(int(gaps.argmax()) + 1))
+
+    labels = np.empty(len(order), dtype=np.int64)
+    for cluster, members in enumerate(np.array_split(order, clusters)):
+        labels[members] = cluster
+    return labels
+
+
+def _capacitated_assign(points, centers, capacity):
+    """Affectation au centre le plus proche non saturé, par regret décroissant"""
+    scores = points @ centers.T  # plus grand produit scalaire = plus proche
+    ranks = np.argsort(-scores, axis=1)
+    if centers.shape[0] > 1:
+        best = np.take_along_axis(scores, ranks[:, :2], axis=1)
+        order = np.argsort(best[:, 1] - best[:, 0], kind='stable')
+    else:
+        order = np.arange(len(points))
+
+    labels = np.empty(len(points), dtype=np.int64)
+    load = np.zeros(centers.shape[0], dtype=np.int64)
+    for point in order.tolist():
+        for center in ranks[point].tolist():
+            if load[center] < capacity:
+                labels[point] = center
+                load[center] += 1
+                break
+    return labels
+
+
+def capacitated_kmeans(order_lats, order_lngs, depot_lats, depot_lngs, clusters, capacity):
+    """K-means capacitaire sur la sphère unité, amorcé sur des dépôts éloignés
+
+    Les centres initiaux sont choisis parmi les dépôts des chauffeurs
+    (le plus proche du barycentre des commandes, puis le plus éloigné des
+    centres déjà retenus). Chaque cluster reçoit au plus capacity commandes.
+    Retourne le numéro de cluster de chaque commande.
+    """
+    points = spatial.to_unit_xyz(order_lats, order_lngs)
+    depots = spatial.to_unit_xyz(depot_lats, depot_lngs)
+
+    seeds = [int((depots @ points.mean(axis=0)).argmax())]
+    closest = depots @ depots[seeds[0]]
+    while len(seeds) < clusters:
+        seed = int(closest.argmin())
+        seeds.append(seed)
+        closest = np.maximum(closest, depots @ depots[seed])
+    centers = depots[seeds].copy()
+
+    labels = None
+    for _iteration in range(KMEANS_ITERATIONS):
+        new_labels = _capacitated_assign(points, centers, capacity)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(clusters):
+            members = points[labels == cluster]
+            if len(members):
+                center = members.mean(axis=0)
+                centers[cluster] = center / (np.linalg.norm(center) or 1.0)
+    return labels
+
+
+def assign_depots(order_lats, order_lngs, labels, depot_lats, depot_lngs, max_stops):
+    """Répartir les véhicules (dépôts) entre les clusters de commandes
+
+    Chaque cluster reçoit d'abord son dépôt le plus proche, puis les
+    clusters dont la capacité (véhicules × max_stops) est insuffisante
+    reçoivent les dépôts libres les plus proches; les dépôts restants vont
+    au cluster le plus proche. Nécessite au moins autant de dépôts que de
+    clusters. Retourne le numéro de cluster de chaque dépôt.
+    """
+    clusters = int(labels.max()) + 1
+    points = spatial.to_unit_xyz(order_lats, order_lngs)
+    depots = spatial.to_unit_xyz(depot_lats, depot_lngs)
+
+    centroids = np.stack([points[labels == cluster].mean(axis=0) for cluster in range(clusters)])
+    scores = depots @ centroids.T
+    sizes = np.bincount(labels, minlength=clusters)
+
+    depot_labels = np.full(len(depots), -1, dtype=np.int64)
+    vehicles = np.zeros(clusters, dtype=np.int64)
+
+    def give(cluster):
+        free = np.where(depot_labels < 0, scores[:, cluster], -np.inf)
+        depot = int(free.argmax())
+        depot_labels[depot] = cluster
+        vehicles[cluster] += 1
+
+    # Un véhicule par cluster, les clusters les plus chargés servis en premier
+    for cluster in np.argsort(-sizes, kind='stable').tolist():
+        give(cluster)
+
+    while (depot_labels < 0).any():
+        deficits = sizes - vehicles * max_stops
+        if deficits.max() <= 0:
+            free = depot_labels < 0
+            depot_labels[free] = scores[free].argmax(axis=1)
+            break
+        give(int(deficits.argmax()))
+    return depot_labels
+
+
+def worker_count(num_tasks, max_workers=None):
+    """Nombre de processus utilisés pour num_tasks clusters"""
+    return max(1, min(num_tasks, max_workers or os.cpu_count() or 1))
+
+
+def fork_safe():
+    """Fork sans risque: aucun autre thread ne peut détenir un verrou copié dans l'enfant"""
+    return threading.active_count() == 1
+
+
+def _init_child():
+    # Les gestionnaires de signaux du serveur (arrêt, rechargement) ne concernent pas l'enfant
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD):
+        signal.signal(signum, signal.SIG_DFL)
+
+
+def solve_cluster(task):
+    """Point d'entrée des processus: résolution d'un cluster (voir multi_depot.solve)"""
+    return multi_depot.solve(**task)
+
+
+def solve_clusters(tasks, max_workers=1):
+    """Résoudre les clusters, (indice, résultat) dans l'ordre de fin
+
+    Séquentiel par défaut; avec max_workers > 1 (et un seul thread actif,
+    voir fork_safe), en parallèle dans des processus créés par fork, qui
+    n'ont pas à réimporter Odoo ni le module. Les tâches ne contiennent que
+    des tableaux et des nombres: les enfants n'utilisent ni environnement ni
+    curseur, et se terminent sans exécuter les finaliseurs du parent (la
+    connexion à la base héritée n'est jamais fermée par un enfant).
+    """
+    workers = worker_count(len(tasks), max_workers)
+    if workers <= 1 or not fork_safe():
+        for index, task in enumerate(tasks):
+            yield index, solve_cluster(task)
+        return
+
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_child) as pool:
+        futures = {pool.submit(solve_cluster, task): index for index, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,118 @@
+# tools/geo.py - NOYAU GÉOGRAPHIQUE VECTORISÉ (NumPy)
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+# Taille des blocs de lignes pour limiter la mémoire temporaire (lignes x N float64)
+ROW_CHUNK = 512
+
+# Geohash: alphabet base 32 standard, 7 caractères ≈ cellules de 153 m x 153 m
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 7
+
+
+def as_arrays(locations):
+    """Convertir une liste de dicts {'lat', 'lng'} en deux tableaux float64"""
+    lats = np.fromiter((float(loc['lat']) for loc in locations), dtype=np.float64, count=len(locations))
+    lngs = np.fromiter((float(loc['lng']) for loc in locations), dtype=np.float64, count=len(locations))
+    return lats, lngs
+
+
+def valid_coordinates(lat, lng):
+    """(lat, lng) en float s'ils sont dans les bornes et non nuls, sinon None"""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (ValueError, TypeError):
+        return None
+    if -90 <= lat <= 90 and -180 <= lng <= 180 and lat != 0.0 and lng != 0.0:
+        return lat, lng
+    return None
+
+
+def json_coordinates(coordinates):
+    """Coordonnées valides d'un champ JSON {'latitude', 'longitude'}, sinon None"""
+    if not coordinates or not isinstance(coordinates, dict):
+        return None
+    return valid_coordinates(coordinates.get('latitude', 0.0), coordinates.get('longitude', 0.0))
+
+
+def geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Geohash standard (bits de longitude et latitude entrelacés, base 32)"""
+    bounds = [[-90.0, 90.0], [-180.0, 180.0]]
+    values = (lat, lng)
+    chars = []
+    bit, code, axis = 0, 0, 1  # le premier bit porte sur la longitude
+    while len(chars) < precision:
+        low, high = bounds[axis]
+        middle = (low + high) / 2.0
+        code <<= 1
+        if values[axis] >= middle:
+            code |= 1
+            bounds[axis][0] = middle
+        else:
+            bounds[axis][1] = middle
+        axis = 1 - axis
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_ALPHABET[code])
+            bit, code = 0, 0
+    return ''.join(chars)
+
+
+def bounding_box(lat, lng, radius_m):
+    """(lat min, lng min, lat max, lng max) en degrés contenant le cercle de rayon radius_m"""
+    delta_lat = float(np.degrees(radius_m / EARTH_RADIUS_M))
+    # Près des pôles, toute la bande de longitudes
+    cos_lat = float(np.cos(np.radians(lat)))
+    delta_lng = float(np.degrees(radius_m / (EARTH_RADIUS_M * cos_lat))) if cos_lat > 1e-6 else 180.0
+    return (
+        max(lat - delta_lat, -90.0), max(lng - delta_lng, -180.0),
+        min(lat + delta_lat, 90.0), min(lng + delta_lng, 180.0),
+    )
+
+
+def _haversine(lat1, lng1, lat2, lng2):
+    """Distance haversine (mètres, float64) entre tableaux en radians diffusables"""
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(np.clip(1.0 - a, 0.0, None)))
+
+
+def haversine_block(src_lats, src_lngs, dst_lats, dst_lngs):
+    """Matrice rectangulaire sources x destinations en mètres (int32)"""
+    src_lat = np.radians(np.asarray(src_lats, dtype=np.float64))[:, None]
+    src_lng = np.radians(np.asarray(src_lngs, dtype=np.float64))[:, None]
+    dst_lat = np.radians(np.asarray(dst_lats, dtype=np.float64))[None, :]
+    dst_lng = np.radians(np.asarray(dst_lngs, dtype=np.float64))[None, :]
+    return _haversine(src_lat, src_lng, dst_lat, dst_lng).astype(np.int32)
+
+
+def haversine_matrix(lats, lngs):
+    """Matrice carrée symétrique N x N en mètres (int32)
+
+    Seul le triangle supérieur est calculé (par blocs de lignes), puis recopié
+    dans le triangle inférieur.
+    """
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+    size = lat.shape[0]
+    matrix = np.zeros((size, size), dtype=np.int32)
+
+    for start in range(0, size, ROW_CHUNK):
+        stop = min(start + ROW_CHUNK, size)
+        block = _haversine(
+            lat[start:stop, None], lng[start:stop, None],
+            lat[None, start:], lng[None, start:]
+        ).astype(np.int32)
+        matrix[start:stop, start:] = block
+        matrix[start:, start:stop] = block.T
+
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+
+def location_matrix(locations):
+    """Matrice haversine N x N (int32) pour une liste de dicts {'lat', 'lng'}"""
+    lats, lngs = as_arrays(locations)
+    return haversine_matrix(lats, lngs)
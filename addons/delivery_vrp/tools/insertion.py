@@ -0,0 +1,86 @@
+# tools/insertion.py - INSERTION PAR REGRET DANS DES TOURNÉES EXISTANTES
+import numpy as np
+
+
+def route_length(matrix, depot, stops):
+    """Coût d'une tournée fermée dépôt → arrêts → dépôt"""
+    path = np.array([depot] + list(stops) + [depot])
+    return float(matrix[path[:-1], path[1:]].sum())
+
+
+def regret_insertion(matrix, depots, routes, candidates, frozen=None, max_stops=None, max_distance=None):
+    """Insérer des nœuds dans des tournées fermées par insertion au moindre coût avec regret
+
+    À chaque pas, le nœud inséré est celui dont le regret (écart entre sa
+    meilleure et sa deuxième meilleure tournée) est le plus grand: les nœuds
+    qui n'ont qu'une bonne tournée sont placés avant qu'elle ne se remplisse.
+    Seule la tournée modifiée est réévaluée après une insertion.
+
+    depots[r] est le nœud de départ et d'arrivée de la tournée r, routes[r]
+    la liste de ses arrêts. frozen[r] arrêts en tête de la tournée r sont
+    figés: aucune insertion avant eux. max_stops et max_distance (unités
+    de la matrice) bornent chaque tournée.
+
+    Retourne (tournées complétées, nœuds non insérés).
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    routes = [list(stops) for stops in routes]
+    frozen = list(frozen) if frozen is not None else [0] * len(routes)
+    candidates = np.asarray(candidates, dtype=np.int64)
+    if not len(candidates) or not routes:
+        return routes, candidates.tolist()
+
+    lengths = [route_length(matrix, depot, stops) for depot, stops in zip(depots, routes)]
+    best_cost = np.full((len(candidates), len(routes)), np.inf)
+    best_position = np.zeros((len(candidates), len(routes)), dtype=np.int64)
+    active = np.ones(len(candidates), dtype=bool)
+
+    def evaluate(route):
+        """Meilleure position de chaque candidat dans la tournée route"""
+        if max_stops and len(routes[route]) >= max_stops:
+            best_cost[:, route] = np.inf
+            return
+        path = np.array([depots[route]] + routes[route] + [depots[route]])
+        before = path[frozen[route]:-1]
+        after = path[frozen[route] + 1:]
+        # delta[p, u]: surcoût de u inséré entre before[p] et after[p]
+        delta = (
+            matrix[np.ix_(before, candidates)]
+            + matrix[np.ix_(candidates, after)].T
+            - matrix[before, after][:, None]
+        )
+        if max_distance:
+            delta[lengths[route] + delta > max_distance] = np.inf
+        best_position[:, route] = delta.argmin(axis=0) + frozen[route]
+        best_cost[:, route] = delta.min(axis=0)
+
+    for route in range(len(routes)):
+        evaluate(route)
+
+    unassigned = []
+    while active.any():
+        indexes = np.flatnonzero(active)
+        costs = best_cost[indexes]
+        first = costs.min(axis=1)
+
+        impossible = np.isinf(first)
+        if impossible.any():
+            unassigned.extend(candidates[indexes[impossible]].tolist())
+            active[indexes[impossible]] = False
+            continue
+
+        if costs.shape[1] > 1:
+            second = np.partition(costs, 1, axis=1)[:, 1]
+            regret = np.where(np.isinf(second), np.inf, second - first)
+        else:
+            regret = np.zeros(len(indexes))
+        # Plus grand regret, puis plus petit surcoût
+        pick = indexes[np.lexsort((first, -regret))[0]]
+
+        route = int(best_cost[pick].argmin())
+        routes[route].insert(int(best_position[pick, route]), int(candidates[pick]))
+        lengths[route] += float(best_cost[pick, route])
+        active[pick] = False
+        evaluate(route)
+
+    return routes, unassigned
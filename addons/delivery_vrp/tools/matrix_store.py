@@ -0,0 +1,95 @@
+# tools/matrix_store.py - DERNIÈRES MATRICES ROUTIÈRES PAR CONTEXTE DE PLANIFICATION
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Contextes (société, date, service) conservés par processus
+MAX_CONTEXTS = 4
+
+# Nœuds conservés par contexte (float32: 2 matrices de 2000² ≈ 32 Mo)
+MAX_NODES = 2000
+
+# contexte -> (index {clé: position}, clés, distances, durées); NaN = paire inconnue
+_entries = OrderedDict()
+_entries_lock = threading.Lock()
+
+
+def _positions(index, keys):
+    return np.fromiter((index.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+
+
+def prefill(context, keys, distances, durations):
+    """Recopier les paires connues du contexte dans des matrices NaN (N x N, en place)
+
+    keys donne la clé de coordonnées de chaque ligne. Seules les cases encore
+    NaN sont remplies. Retourne le masque des lignes dont la clé était connue:
+    les paires restantes concernent toutes au moins un nouveau nœud.
+    """
+    with _entries_lock:
+        entry = _entries.get(context)
+        if entry is not None:
+            _entries.move_to_end(context)
+    if entry is None:
+        return np.zeros(len(keys), dtype=bool)
+
+    index, _keys, stored_distances, stored_durations = entry
+    stored = _positions(index, keys)
+    known = np.flatnonzero(stored >= 0)
+    block = np.ix_(known, known)
+    source = np.ix_(stored[known], stored[known])
+    for target, values in ((distances, stored_distances), (durations, stored_durations)):
+        current = target[block]
+        target[block] = np.where(np.isnan(current), values[source], current)
+    return stored >= 0
+
+
+def update(context, keys, distances, durations):
+    """Fusionner les matrices mesurées d'une requête dans le contexte
+
+    Les nœuds de la requête s'ajoutent à ceux déjà connus; au-delà de
+    MAX_NODES, les nœuds absents de la requête sont retirés en premier.
+    Les cases NaN de la requête (paires non mesurées) ne remplacent pas
+    les valeurs connues.
+    """
+    request_index = {}
+    for position, key in enumerate(keys):
+        request_index.setdefault(key, position)
+    if len(request_index) > MAX_NODES:
+        return
+
+    with _entries_lock:
+        old_index, old_keys, old_distances, old_durations = _entries.pop(context, None) or ({}, [], None, None)
+
+        new_keys = [key for key in request_index if key not in old_index]
+        kept = old_keys
+        if len(kept) + len(new_keys) > MAX_NODES:
+            absent = [key for key in old_keys if key not in request_index]
+            kept = [key for key in old_keys if key in request_index] + absent[:MAX_NODES - len(request_index)]
+
+        merged_keys = kept + new_keys
+        merged_index = {key: position for position, key in enumerate(merged_keys)}
+        size = len(merged_keys)
+        merged_distances = np.full((size, size), np.nan, dtype=np.float32)
+        merged_durations = np.full((size, size), np.nan, dtype=np.float32)
+
+        if kept:
+            old_positions = _positions(old_index, kept)
+            old_block = np.ix_(old_positions, old_positions)
+            merged_distances[:len(kept), :len(kept)] = old_distances[old_block]
+            merged_durations[:len(kept), :len(kept)] = old_durations[old_block]
+
+        request_positions = np.fromiter(request_index.values(), dtype=np.int64, count=len(request_index))
+        merged_positions = _positions(merged_index, request_index)
+        target = np.ix_(merged_positions, merged_positions)
+        source = np.ix_(request_positions, request_positions)
+        for merged, values in ((merged_distances, distances), (merged_durations, durations)):
+            # Tronquées au mètre / à la seconde comme les matrices retournées
+            # (entiers exacts en float32 jusqu'à 2^24)
+            measured = np.trunc(values[source])
+            merged[target] = np.where(np.isnan(measured), merged[target], measured)
+
+        _entries[context] = (merged_index, merged_keys, merged_distances, merged_durations)
+        while len(_entries) > MAX_CONTEXTS:
+            _entries.popitem(last=False)
+
@@ -0,0 +1,123 @@
+# tools/multi_depot.py - CŒUR OR-TOOLS MULTI-DÉPÔTS (TABLEAUX SIMPLES, SANS ORM)
+import logging
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+from ortools.constraint_solver import routing_enums_pb2
+
+from . import anytime
+from . import insertion
+
+_logger = logging.getLogger(__name__)
+
+
+def solve(distances, num_vehicles, max_distance, max_stops, time_limit,
+          plateau_seconds=0, on_improvement=None, initial_routes=None):
+    """Tournées multi-dépôts sur une matrice de distances (m)
+
+    Les nœuds 0..num_vehicles-1 sont les dépôts (départ et arrivée du
+    véhicule de même rang), les suivants sont les commandes. max_distance
+    (m) et max_stops bornent chaque tournée; une commande impossible à
+    servir est écartée (disjonction) plutôt que de rendre le problème
+    infaisable.
+
+    initial_routes (nœuds visités par véhicule, ex: tournées d'une session
+    précédente) amorce la recherche: les commandes absentes y sont d'abord
+    insérées par regret, puis la recherche locale part de cette solution
+    au lieu d'une première solution construite. Si elle viole les
+    contraintes, la résolution repart de zéro.
+
+    Retourne None sans solution, sinon un dict: 'routes' (nœuds visités par
+    véhicule, sans le dépôt), 'dropped' (nœuds écartés), 'history',
+    'elapsed', 'stopped_on_plateau' (voir anytime.SolutionMonitor) et
+    'warm_started'.
+    """
+    distances = np.asarray(distances)
+    num_nodes = len(distances)
+
+    depots = list(range(num_vehicles))
+    manager = pywrapcp.RoutingIndexManager(num_nodes, num_vehicles, depots, depots)
+    routing = pywrapcp.RoutingModel(manager)
+
+    # Transits enregistrés sous forme de matrices natives (pas de rappel Python pendant la recherche)
+    transit_callback_index = routing.RegisterTransitMatrix(distances.tolist())
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+    routing.AddDimension(transit_callback_index, 0, int(max_distance), True, 'Distance')
+
+    # 1 arrêt par commande, 0 par dépôt
+    stop_callback_index = routing.RegisterUnaryTransitVector(
+        [0] * num_vehicles + [1] * (num_nodes - num_vehicles)
+    )
+    routing.AddDimensionWithVehicleCapacity(
+        stop_callback_index, 0, [int(max_stops)] * num_vehicles, True, 'Stops'
+    )
+
+    # Une commande peut être écartée, à un coût supérieur à toute tournée
+    drop_penalty = int(distances.max()) * 10 + 1
+    for node in range(num_vehicles, num_nodes):
+        routing.AddDisjunction([manager.NodeToIndex(node)], drop_penalty)
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = (
+        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    )
+    search_parameters.local_search_metaheuristic = (
+        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    )
+    search_parameters.time_limit.FromSeconds(int(time_limit))
+
+    # Meilleure solution retenue à l'échéance ou après un plateau sans amélioration
+    monitor = anytime.SolutionMonitor(routing, plateau_seconds, on_improvement=on_improvement).attach()
+    initial_assignment = None
+    if initial_routes:
+        initial_assignment = _read_initial_routes(
+            routing, manager, search_parameters, distances, num_vehicles, max_distance, max_stops, initial_routes
+        )
+    if initial_assignment is not None:
+        solution = routing.SolveFromAssignmentWithParameters(initial_assignment, search_parameters)
+    else:
+        solution = routing.SolveWithParameters(search_parameters)
+    if not solution:
+        return None
+
+    routes = []
+    for vehicle in range(num_vehicles):
+        nodes = []
+        index = solution.Value(routing.NextVar(routing.Start(vehicle)))
+        while not routing.IsEnd(index):
+            nodes.append(manager.IndexToNode(index))
+            index = solution.Value(routing.NextVar(index))
+        routes.append(nodes)
+
+    dropped = [
+        node for node in range(num_vehicles, num_nodes)
+        if solution.Value(routing.NextVar(manager.NodeToIndex(node))) == manager.NodeToIndex(node)
+    ]
+    return {
+        'routes': routes,
+        'dropped': dropped,
+        'history': monitor.history,
+        'elapsed': monitor.elapsed,
+        'stopped_on_plateau': monitor.stopped_on_plateau,
+        'warm_started': initial_assignment is not None,
+    }
+
+
+def _read_initial_routes(routing, manager, search_parameters, distances, num_vehicles,
+                         max_distance, max_stops, initial_routes):
+    """Solution initiale OR-Tools à partir de tournées connues, complétée par insertion"""
+    visited = {node for route in initial_routes for node in route}
+    missing = [node for node in range(num_vehicles, len(distances)) if node not in visited]
+    routes, _unassigned = insertion.regret_insertion(
+        distances, list(range(num_vehicles)), initial_routes, missing,
+        max_stops=max_stops, max_distance=max_distance,
+    )
+
+    routing.CloseModelWithParameters(search_parameters)
+    assignment = routing.ReadAssignmentFromRoutes(
+        [[manager.NodeToIndex(node) for node in route] for route in routes], True
+    )
+    if assignment is None:
+        _logger.info("OR-Tools: tournées initiales incompatibles avec les contraintes, démarrage à froid")
+    return assignment
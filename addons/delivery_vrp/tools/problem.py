@@ -0,0 +1,94 @@
+# tools/problem.py - REPRÉSENTATION DU PROBLÈME VRP SANS ORM (TABLEAUX NumPy)
+import numpy as np
+
+
+class VehicleSpec:
+    """Véhicule disponible: identifiants, libellés et dépôt (domicile du chauffeur)"""
+
+    __slots__ = ('vehicle_id', 'name', 'driver_name', 'lat', 'lng')
+
+    def __init__(self, vehicle_id, name, driver_name, lat, lng):
+        self.vehicle_id = int(vehicle_id)
+        self.name = name
+        self.driver_name = driver_name
+        self.lat = float(lat)
+        self.lng = float(lng)
+
+    def __repr__(self):
+        return f"VehicleSpec({self.vehicle_id}, {self.name!r}, {self.lat}, {self.lng})"
+
+
+class VRPProblem:
+    """Commandes et véhicules d'une optimisation, sous forme de tableaux
+
+    Convention des nœuds partagée par les matrices et les solveurs: les
+    nœuds 0..V-1 sont les dépôts des véhicules (dans l'ordre de vehicles),
+    les nœuds V..V+N-1 les commandes (dans l'ordre de order_ids).
+    L'objet ne contient que des nombres et des chaînes: il se transmet
+    sans coût notable à un autre processus.
+    """
+
+    __slots__ = ('order_ids', 'order_names', 'order_lats', 'order_lngs', 'vehicles')
+
+    def __init__(self, order_ids, order_names, order_lats, order_lngs, vehicles):
+        self.order_ids = np.asarray(order_ids, dtype=np.int64)
+        self.order_names = list(order_names)
+        self.order_lats = np.asarray(order_lats, dtype=np.float64)
+        self.order_lngs = np.asarray(order_lngs, dtype=np.float64)
+        self.vehicles = list(vehicles)
+
+    @property
+    def num_orders(self):
+        return len(self.order_ids)
+
+    @property
+    def num_vehicles(self):
+        return len(self.vehicles)
+
+    @property
+    def vehicle_ids(self):
+        return np.array([vehicle.vehicle_id for vehicle in self.vehicles], dtype=np.int64)
+
+    @property
+    def depot_lats(self):
+        return np.array([vehicle.lat for vehicle in self.vehicles], dtype=np.float64)
+
+    @property
+    def depot_lngs(self):
+        return np.array([vehicle.lng for vehicle in self.vehicles], dtype=np.float64)
+
+    def node_lats(self):
+        return np.concatenate((self.depot_lats, self.order_lats))
+
+    def node_lngs(self):
+        return np.concatenate((self.depot_lngs, self.order_lngs))
+
+    def locations(self):
+        """Nœuds (dépôts puis commandes) au format {'lat', 'lng'} des services de routage"""
+        return [{'lat': lat, 'lng': lng} for lat, lng in zip(self.node_lats().tolist(), self.node_lngs().tolist())]
+
+    def node_order_ids(self, nodes):
+        """Identifiants des commandes des nœuds donnés (liste d'entiers)"""
+        return self.order_ids[np.asarray(nodes, dtype=np.int64) - self.num_vehicles].tolist()
+
+    def subset(self, order_indexes, vehicle_indexes):
+        """Sous-problème restreint à des commandes et véhicules (indices dans ce problème)"""
+        order_indexes = np.asarray(order_indexes, dtype=np.int64)
+        return VRPProblem(
+            self.order_ids[order_indexes],
+            [self.order_names[i] for i in order_indexes.tolist()],
+            self.order_lats[order_indexes],
+            self.order_lngs[order_indexes],
+            [self.vehicles[i] for i in vehicle_indexes],
+        )
+
+    def route_stats(self, vehicle_index, stops, distance=0):
+        """Statistiques initiales d'une tournée au format du résultat d'optimisation"""
+        vehicle = self.vehicles[vehicle_index]
+        return {
+            'distance': int(distance),
+            'stops': stops,
+            'vehicle_name': vehicle.name,
+            'driver': vehicle.driver_name,
+            'driver_coords': (vehicle.lat, vehicle.lng),
+        }
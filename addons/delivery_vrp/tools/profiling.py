@@ -0,0 +1,106 @@
+# tools/profiling.py - CHRONOMÉTRAGE PAR ÉTAPES DU PIPELINE VRP
+import contextlib
+import functools
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Profil actif du thread courant (requête HTTP ou tâche planifiée)
+_local = threading.local()
+
+
+class Profile:
+    """Étapes chronométrées d'une exécution du pipeline
+
+    Chaque étape enregistre sa durée (s), le nombre de requêtes SQL émises
+    sur le curseur et des compteurs libres (commandes, nœuds...). Les
+    étapes imbriquées sont nommées par leur chemin ('optimize/matrix').
+    """
+
+    def __init__(self, cr=None, verbose=False):
+        self.cr = cr
+        self.verbose = verbose
+        self.stages = []
+        self._path = []
+        self._started = time.perf_counter()
+
+    def _query_count(self):
+        return getattr(self.cr, 'sql_log_count', 0)
+
+    @contextlib.contextmanager
+    def span(self, name, **counts):
+        self._path.append(name)
+        entry = {'stage': '/'.join(self._path), **counts}
+        started, queries = time.perf_counter(), self._query_count()
+        try:
+            yield entry
+        finally:
+            self._path.pop()
+            entry['duration'] = round(time.perf_counter() - started, 4)
+            entry['queries'] = self._query_count() - queries
+            self.stages.append(entry)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    def report(self):
+        """Rapport JSON: durée totale (s) et étapes dans l'ordre de fin"""
+        return {'total': round(self.elapsed, 4), 'stages': list(self.stages)}
+
+    def summary(self):
+        return ', '.join(f"{entry['stage']} {entry['duration']:.2f}s/{entry['queries']}q" for entry in self.stages)
+
+
+@contextlib.contextmanager
+def profile(cr=None, verbose=False):
+    """Activer un profil pour le thread courant
+
+    Un profil déjà actif est réutilisé: les points d'entrée imbriqués
+    (ex: action appelant la préparation de carte) ajoutent leurs étapes au
+    profil englobant. Le résumé est journalisé en une ligne à la sortie.
+    """
+    current = getattr(_local, 'profile', None)
+    if current is not None:
+        yield current
+        return
+
+    _local.profile = Profile(cr, verbose)
+    try:
+        yield _local.profile
+    finally:
+        finished, _local.profile = _local.profile, None
+        _logger.info(f"Profil VRP ({finished.elapsed:.2f}s): {finished.summary()}")
+
+
+def profiled(method):
+    """Décorateur de point d'entrée (action): méthode exécutée sous un profil
+
+    Le curseur et le journal détaillé (vrp_debug_logging) sont ceux de
+    l'environnement de l'enregistrement.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with profile(self.env.cr, verbose=self.env.company.vrp_debug_logging):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def span(name, **counts):
+    """Étape chronométrée du profil actif; sans profil actif, rien n'est enregistré
+
+    Le dict retourné par le contexte accepte des compteurs connus en cours
+    d'étape (entry['nodes'] = ...).
+    """
+    current = getattr(_local, 'profile', None)
+    if current is None:
+        return contextlib.nullcontext({})
+    return current.span(name, **counts)
+
+
+def verbose():
+    """Journalisation détaillée (par commande) demandée pour le profil actif"""
+    current = getattr(_local, 'profile', None)
+    return bool(current is not None and current.verbose)
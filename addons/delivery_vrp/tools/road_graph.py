@@ -0,0 +1,247 @@
+# tools/road_graph.py - GRAPHE ROUTIER LOCAL (CSR) ET PLUS COURTS CHEMINS
+import heapq
+import logging
+import os
+import threading
+
+import numpy as np
+
+from . import geo
+
+_logger = logging.getLogger(__name__)
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as _scipy_dijkstra
+except ImportError:  # scipy est optionnel, repli sur un Dijkstra pur Python
+    csr_matrix = None
+    _scipy_dijkstra = None
+
+# Vitesse utilisée pour le trajet entre la coordonnée et le nœud routier (m/s)
+SNAP_SPEED = 8.33
+
+# Taille des cellules de la grille d'accrochage (degrés, ~1 km)
+GRID_CELL = 0.01
+
+# Nombre de sources par appel au Dijkstra scipy
+SCIPY_BATCH = 64
+
+
+class RoadGraph:
+    """Réseau routier orienté stocké en tableaux CSR
+
+    indptr/indices: structure CSR des arcs sortants de chaque nœud,
+    lengths (m) / durations (s): poids des arcs dans le même ordre.
+    """
+
+    def __init__(self, node_lats, node_lngs, edge_sources, edge_targets, edge_lengths, edge_durations):
+        self.node_lats = np.asarray(node_lats, dtype=np.float64)
+        self.node_lngs = np.asarray(node_lngs, dtype=np.float64)
+        node_count = len(self.node_lats)
+
+        edge_sources = np.asarray(edge_sources, dtype=np.int64)
+        edge_targets = np.asarray(edge_targets, dtype=np.int64)
+        # Poids strictement positifs (un poids nul vaut « pas d'arc » pour scipy)
+        edge_lengths = np.maximum(np.asarray(edge_lengths, dtype=np.float64), 1e-3)
+        edge_durations = np.maximum(np.asarray(edge_durations, dtype=np.float64), 1e-3)
+
+        # Tri par (source, cible, longueur) et suppression des arcs parallèles plus longs
+        order = np.lexsort((edge_lengths, edge_targets, edge_sources))
+        edge_sources, edge_targets = edge_sources[order], edge_targets[order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = (edge_sources[1:] != edge_sources[:-1]) | (edge_targets[1:] != edge_targets[:-1])
+
+        self.indices = edge_targets[keep].astype(np.int32)
+        self.lengths = edge_lengths[order][keep]
+        self.durations = edge_durations[order][keep]
+        self.indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_sources[keep], minlength=node_count), out=self.indptr[1:])
+
+        self._build_grid()
+        self._python_csr = None
+        self._scipy_graphs = {}
+
+    @property
+    def node_count(self):
+        return len(self.node_lats)
+
+    @classmethod
+    def load(cls, path):
+        """Charger un fichier .npz (node_lats, node_lngs, edge_sources, edge_targets,
+        edge_lengths[, edge_durations])"""
+        with np.load(path) as data:
+            lengths = data['edge_lengths']
+            durations = data['edge_durations'] if 'edge_durations' in data.files else lengths / SNAP_SPEED
+            return cls(
+                data['node_lats'], data['node_lngs'],
+                data['edge_sources'], data['edge_targets'],
+                lengths, durations
+            )
+
+    # ---------------------------------------------------------------
+    # Accrochage des coordonnées aux nœuds (grille régulière)
+    # ---------------------------------------------------------------
+
+    def _cell_keys(self, lats, lngs):
+        rows = np.floor(np.asarray(lats) / GRID_CELL).astype(np.int64)
+        cols = np.floor(np.asarray(lngs) / GRID_CELL).astype(np.int64)
+        return rows, cols
+
+    def _build_grid(self):
+        rows, cols = self._cell_keys(self.node_lats, self.node_lngs)
+        order = np.lexsort((cols, rows))
+        self._grid_nodes = order
+        cells = np.stack([rows[order], cols[order]], axis=1)
+        unique_cells, starts = np.unique(cells, axis=0, return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self._grid = {
+            (int(row), int(col)): (int(start), int(end))
+            for (row, col), start, end in zip(unique_cells, starts, ends)
+        }
+
+    def _cell_candidates(self, row, col, ring):
+        candidates = []
+        for d_row in range(-ring, ring + 1):
+            for d_col in range(-ring, ring + 1):
+                if max(abs(d_row), abs(d_col)) != ring:
+                    continue
+                bounds = self._grid.get((row + d_row, col + d_col))
+                if bounds:
+                    candidates.append(self._grid_nodes[bounds[0]:bounds[1]])
+        return candidates
+
+    def snap(self, lats, lngs, max_ring=5):
+        """Nœud le plus proche de chaque coordonnée et distance d'accrochage (m)
+
+        Retourne (nodes, distances); nodes vaut -1 si aucun nœud dans max_ring cellules.
+        """
+        rows, cols = self._cell_keys(lats, lngs)
+        nodes = np.full(len(rows), -1, dtype=np.int64)
+        distances = np.full(len(rows), np.inf)
+
+        for index, (row, col) in enumerate(zip(rows.tolist(), cols.tolist())):
+            candidates = []
+            for ring in range(max_ring + 1):
+                candidates.extend(self._cell_candidates(row, col, ring))
+                if candidates:
+                    # Un anneau de plus: le plus proche peut être dans une cellule voisine
+                    candidates.extend(self._cell_candidates(row, col, ring + 1))
+                    break
+            if not candidates:
+                continue
+            candidates = np.concatenate(candidates)
+            block = geo.haversine_block(
+                [lats[index]], [lngs[index]],
+                self.node_lats[candidates], self.node_lngs[candidates]
+            )[0]
+            best = int(block.argmin())
+            nodes[index] = candidates[best]
+            distances[index] = block[best]
+        return nodes, distances
+
+    # ---------------------------------------------------------------
+    # Plus courts chemins plusieurs-à-plusieurs
+    # ---------------------------------------------------------------
+
+    def shortest_paths(self, source_nodes, target_nodes, weight='lengths'):
+        """Table des coûts source x cible (float64, inf = injoignable)"""
+        weights = getattr(self, weight)
+        source_nodes = np.asarray(source_nodes, dtype=np.int64)
+        target_nodes = np.asarray(target_nodes, dtype=np.int64)
+
+        if _scipy_dijkstra is not None:
+            graph = self._scipy_graphs.get(weight)
+            if graph is None:
+                graph = self._scipy_graphs[weight] = csr_matrix(
+                    (weights, self.indices, self.indptr), shape=(self.node_count, self.node_count)
+                )
+            unique_sources, inverse = np.unique(source_nodes, return_inverse=True)
+            costs = np.empty((len(unique_sources), len(target_nodes)))
+            # Par lots pour borner la mémoire (lot x nombre de nœuds)
+            for start in range(0, len(unique_sources), SCIPY_BATCH):
+                batch = unique_sources[start:start + SCIPY_BATCH]
+                costs[start:start + len(batch)] = _scipy_dijkstra(graph, directed=True, indices=batch)[:, target_nodes]
+            return costs[inverse]
+
+        return self._python_shortest_paths(source_nodes, target_nodes, weight)
+
+    def _python_shortest_paths(self, source_nodes, target_nodes, weight):
+        """Dijkstra par lots sur tableaux CSR, arrêt dès que toutes les cibles sont fixées"""
+        if self._python_csr is None:
+            self._python_csr = (self.indptr.tolist(), self.indices.tolist())
+        indptr, indices = self._python_csr
+        weights = getattr(self, weight).tolist()
+
+        target_list = target_nodes.tolist()
+        results = {}
+        for source in set(source_nodes.tolist()):
+            remaining = set(target_list)
+            best = {source: 0.0}
+            settled = set()
+            heap = [(0.0, source)]
+            while heap and remaining:
+                cost, node = heapq.heappop(heap)
+                if node in settled:
+                    continue
+                settled.add(node)
+                remaining.discard(node)
+                for edge in range(indptr[node], indptr[node + 1]):
+                    neighbour = indices[edge]
+                    new_cost = cost + weights[edge]
+                    if new_cost < best.get(neighbour, float('inf')):
+                        best[neighbour] = new_cost
+                        heapq.heappush(heap, (new_cost, neighbour))
+            results[source] = [best[t] if t in settled else np.inf for t in target_list]
+
+        return np.array([results[source] for source in source_nodes.tolist()], dtype=np.float64).reshape(
+            len(source_nodes), len(target_list)
+        )
+
+    def table(self, lats, lngs, sources, destinations, snap_tolerance=2000):
+        """Matrices distances (m) et durées (s) entre coordonnées
+
+        Le trajet d'accrochage (coordonnée → nœud) est ajouté aux deux extrémités.
+        Lève une exception si une coordonnée est trop loin du réseau.
+        """
+        nodes, snap_distances = self.snap(lats, lngs)
+        too_far = (nodes < 0) | (snap_distances > snap_tolerance)
+        if too_far.any():
+            raise Exception(f"{int(too_far.sum())} coordonnées hors du graphe routier")
+
+        sources = np.asarray(sources, dtype=np.int64)
+        destinations = np.asarray(destinations, dtype=np.int64)
+        snap_offsets = snap_distances[sources][:, None] + snap_distances[destinations][None, :]
+
+        distances = self.shortest_paths(nodes[sources], nodes[destinations], 'lengths') + snap_offsets
+        durations = self.shortest_paths(nodes[sources], nodes[destinations], 'durations') + snap_offsets / SNAP_SPEED
+
+        # Même point de départ et d'arrivée
+        same = sources[:, None] == destinations[None, :]
+        distances[same] = 0.0
+        durations[same] = 0.0
+
+        distances[np.isinf(distances)] = np.nan
+        durations[np.isinf(durations)] = np.nan
+        return distances, durations
+
+
+# Graphes chargés une fois par processus, rechargés si le fichier change
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def load_road_graph(path):
+    """Graphe routier partagé pour un fichier donné"""
+    mtime = os.path.getmtime(path)
+    cached = _graphs.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _graphs_lock:
+        cached = _graphs.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        graph = RoadGraph.load(path)
+        _graphs[path] = (mtime, graph)
+        _logger.info(f"Graphe routier chargé: {path} ({graph.node_count} nœuds, {len(graph.indices)} arcs)")
+    return graph
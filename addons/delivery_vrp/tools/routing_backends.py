@@ -0,0 +1,276 @@
+# tools/routing_backends.py - BACKENDS DE CALCUL DE MATRICES ROUTIÈRES
+import contextlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from . import geo
+from . import road_graph
+from . import routing_http
+
+_logger = logging.getLogger(__name__)
+
+BACKENDS = {}
+
+
+def register_backend(cls):
+    """Décorateur d'enregistrement d'un backend sous son nom de service"""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def get_backend(name, config, settings):
+    """Instancier le backend d'un service (None si inconnu)"""
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        return None
+    return backend_class(config, settings)
+
+
+def is_persisted(name):
+    """Les résultats du service sont-ils conservés dans le cache de distances en base"""
+    backend_class = BACKENDS.get(name)
+    return bool(backend_class and backend_class.persisted)
+
+
+class RoutingBackend:
+    """Interface commune des backends de matrices
+
+    table() reçoit la liste des coordonnées {'lat', 'lng'} et les indices
+    sources/destinations, et retourne deux tableaux float64
+    (distances en mètres, durées en secondes, NaN = injoignable).
+    Toute erreur est levée sous forme d'exception.
+    Les backends sont appelés depuis des threads: aucun accès ORM.
+    persisted: résultats conservés dans le cache de distances en base
+    (faux pour les calculs locaux, quasi gratuits et liés à un fichier).
+    """
+    name = None
+    persisted = True
+
+    def __init__(self, config, settings):
+        self.config = config
+        self.settings = settings
+
+    @property
+    def max_locations(self):
+        return self.config.get('max_locations', 25)
+
+    def is_available(self):
+        return True
+
+    def table(self, locations, sources, destinations):
+        raise NotImplementedError
+
+
+class HttpRoutingBackend(RoutingBackend):
+    """Backend distant utilisant le client HTTP partagé du service"""
+
+    @property
+    def client(self):
+        return routing_http.get_client(self.name, self.config)
+
+    def is_available(self):
+        return not self.client.breaker.is_open
+
+
+@register_backend
+class OSRMBackend(HttpRoutingBackend):
+    name = 'osrm'
+
+    def table(self, locations, sources, destinations):
+        coords_str = ";".join(f"{loc['lng']},{loc['lat']}" for loc in locations)
+        params = {
+            'annotations': 'distance,duration',
+            'sources': ";".join(str(i) for i in sources),
+            'destinations': ";".join(str(j) for j in destinations),
+        }
+        data = self.client.get(f"{self.config['base_url']}{coords_str}", params=params).json()
+        if data.get('code') != 'Ok':
+            raise Exception(f"OSRM Error: {data.get('message', 'Unknown error')}")
+        return (
+            np.array(data['distances'], dtype=np.float64),
+            np.array(data['durations'], dtype=np.float64),
+        )
+
+
+@register_backend
+class GraphHopperBackend(HttpRoutingBackend):
+    name = 'graphhopper'
+
+    def table(self, locations, sources, destinations):
+        payload = {
+            'from_points': [[locations[i]['lng'], locations[i]['lat']] for i in sources],
+            'to_points': [[locations[j]['lng'], locations[j]['lat']] for j in destinations],
+            'out_arrays': ['distances', 'times'],
+            'profile': 'car',
+        }
+        params = {'key': self.settings['graphhopper_key']} if self.settings.get('graphhopper_key') else None
+        data = self.client.post(self.config['base_url'], json=payload, params=params).json()
+        if 'distances' not in data:
+            raise Exception(f"GraphHopper Error: {data.get('message', 'Unknown error')}")
+        return (
+            np.array(data['distances'], dtype=np.float64),
+            np.array(data['times'], dtype=np.float64),
+        )
+
+
+@register_backend
+class OpenRouteServiceBackend(HttpRoutingBackend):
+    name = 'openrouteservice'
+
+    def is_available(self):
+        return bool(self.settings.get('openrouteservice_key')) and super().is_available()
+
+    def table(self, locations, sources, destinations):
+        payload = {
+            'locations': [[loc['lng'], loc['lat']] for loc in locations],
+            'sources': list(sources),
+            'destinations': list(destinations),
+            'metrics': ['distance', 'duration'],
+            'units': 'm',
+        }
+        headers = {'Authorization': self.settings.get('openrouteservice_key', '')}
+        data = self.client.post(self.config['base_url'], json=payload, headers=headers).json()
+        if 'distances' not in data:
+            raise Exception(f"OpenRouteService Error: {data.get('error', 'Unknown error')}")
+        return (
+            np.array(data['distances'], dtype=np.float64),
+            np.array(data['durations'], dtype=np.float64),
+        )
+
+
+# Matrices locales chargées une fois par processus, rechargées si le fichier change
+_local_matrices = {}
+_local_matrices_lock = threading.Lock()
+
+
+def load_local_matrix(path):
+    """Charger un fichier .npz (lats, lngs, distances[, durations]) en cache mémoire"""
+    mtime = os.path.getmtime(path)
+    cached = _local_matrices.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _local_matrices_lock:
+        with np.load(path) as data:
+            matrix = {
+                'lats': data['lats'].astype(np.float64),
+                'lngs': data['lngs'].astype(np.float64),
+                'distances': data['distances'].astype(np.float64),
+                'durations': (data['durations'] if 'durations' in data.files
+                              else np.full(data['distances'].shape, np.nan)).astype(np.float64),
+            }
+        _local_matrices[path] = (mtime, matrix)
+        _logger.info(f"Matrice locale chargée: {path} ({len(matrix['lats'])} points)")
+    return matrix
+
+
+@register_backend
+class LocalMatrixBackend(RoutingBackend):
+    """Matrice précalculée sur disque (mode hors-ligne / benchmark)
+
+    Chaque coordonnée demandée est associée au point connu le plus proche,
+    dans la limite de snap_tolerance mètres.
+    """
+    name = 'local'
+    persisted = False
+
+    @property
+    def path(self):
+        return self.settings.get('local_matrix_path')
+
+    def is_available(self):
+        return bool(self.path) and os.path.isfile(self.path)
+
+    def table(self, locations, sources, destinations):
+        matrix = load_local_matrix(self.path)
+        lats, lngs = geo.as_arrays(locations)
+        snap = geo.haversine_block(lats, lngs, matrix['lats'], matrix['lngs'])
+        nodes = snap.argmin(axis=1)
+
+        tolerance = self.config.get('snap_tolerance', 50)
+        too_far = snap[np.arange(len(nodes)), nodes] > tolerance
+        if too_far.any():
+            raise Exception(f"{int(too_far.sum())} coordonnées absentes de la matrice locale")
+
+        block = np.ix_(nodes[list(sources)], nodes[list(destinations)])
+        return matrix['distances'][block], matrix['durations'][block]
+
+
+@register_backend
+class RoadGraphBackend(RoutingBackend):
+    """Plus courts chemins calculés en mémoire sur un graphe routier CSR local"""
+    name = 'road_graph'
+    persisted = False
+
+    @property
+    def path(self):
+        return self.settings.get('road_graph_path')
+
+    def is_available(self):
+        return bool(self.path) and os.path.isfile(self.path)
+
+    def table(self, locations, sources, destinations):
+        graph = road_graph.load_road_graph(self.path)
+        lats, lngs = geo.as_arrays(locations)
+        return graph.table(lats, lngs, sources, destinations, self.config.get('snap_tolerance', 2000))
+
+
+@contextlib.contextmanager
+def hedge_pool(max_workers):
+    """Pool partagé des requêtes de hedged_table; fermé sans attendre les requêtes perdantes"""
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        yield executor
+    finally:
+        executor.shutdown(wait=False)
+
+
+def hedged_table(backends, locations, sources, destinations, hedge_delay=1.0, executor=None):
+    """Interroger le premier backend, puis le second s'il tarde ou échoue
+
+    La première réponse valide gagne. Retourne (distances, durations, nom du
+    backend) ou lève la dernière erreur rencontrée. executor: pool partagé
+    par les tuiles d'une même matrice (distinct du pool qui appelle cette
+    fonction); à défaut, un pool est créé pour l'appel.
+    """
+    backends = [backend for backend in backends if backend and backend.is_available()]
+    if not backends:
+        raise routing_http.CircuitOpenError("Aucun backend de routage disponible")
+
+    if len(backends) == 1:
+        distances, durations = backends[0].table(locations, sources, destinations)
+        return distances, durations, backends[0].name
+
+    owned = executor is None
+    if owned:
+        executor = ThreadPoolExecutor(max_workers=len(backends))
+    try:
+        pending = {executor.submit(backends[0].table, locations, sources, destinations): backends[0]}
+        hedges = iter(backends[1:])
+        last_error = None
+
+        while pending:
+            done, _not_done = wait(pending, timeout=hedge_delay, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    distances, durations = future.result()
+                    return distances, durations, backend.name
+                except Exception as e:
+                    last_error = e
+                    _logger.warning(f"Backend {backend.name} en échec: {e}")
+
+            # Réponse trop lente ou en échec: envoyer la requête de couverture
+            hedge = next(hedges, None)
+            if hedge is not None:
+                pending[executor.submit(hedge.table, locations, sources, destinations)] = hedge
+
+        raise last_error
+    finally:
+        # Ne pas attendre la requête perdante
+        if owned:
+            executor.shutdown(wait=False)
@@ -0,0 +1,170 @@
+# tools/routing_http.py - CLIENT HTTP PARTAGÉ POUR LES SERVICES DE ROUTAGE
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Le service de routage est considéré indisponible (circuit ouvert)"""
+
+
+class TokenBucket:
+    """Limiteur de débit à jetons (thread-safe)
+
+    rate: jetons ajoutés par seconde, capacity: rafale maximale.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Attendre un jeton; retourne False si le délai est dépassé"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Disjoncteur: ouvert après N échecs consécutifs, demi-ouvert après reset_timeout"""
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self):
+        """Autoriser un appel (un appel d'essai passe une fois le délai écoulé)"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Demi-ouvert: on laisse passer un appel, le prochain échec ré-ouvre
+                self._opened_at = time.monotonic()
+                self._failures = self.failure_threshold - 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    _logger.warning(f"Service de routage indisponible: circuit ouvert pour {self.reset_timeout:.0f}s")
+                self._opened_at = time.monotonic()
+
+
+class RoutingHttpClient:
+    """Session HTTP keep-alive avec limitation de débit, retries et disjoncteur"""
+
+    def __init__(self, service_name, config):
+        self.service_name = service_name
+        self.connect_timeout = config.get('connect_timeout', 5)
+        self.read_timeout = config.get('read_timeout', 30)
+        self.max_retries = config.get('max_retries', 2)
+        self.backoff_base = config.get('backoff_base', 0.5)
+
+        # rate_limit = intervalle minimal (secondes) entre deux requêtes
+        rate_limit = config.get('rate_limit') or 0.0
+        self.bucket = TokenBucket(1.0 / rate_limit, config.get('burst', 2)) if rate_limit > 0 else None
+        self.breaker = CircuitBreaker(
+            config.get('failure_threshold', 3),
+            config.get('reset_timeout', 60.0)
+        )
+
+        pool_size = config.get('pool_size', 8)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """Exécuter une requête; lève CircuitOpenError si le service est en panne"""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit ouvert pour {self.service_name}")
+
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Backoff exponentiel avec gigue
+                time.sleep(self.backoff_base * (2 ** (attempt - 1)) * (1 + random.random()))
+            if self.bucket:
+                self.bucket.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                continue
+
+            if response.status_code in RETRYABLE_STATUS:
+                last_error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                continue
+
+            # Le service a répondu: une erreur 4xx vient de la requête, pas du service
+            self.breaker.record_success()
+            response.raise_for_status()
+            return response
+
+        self.breaker.record_failure()
+        raise last_error
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+# Un client par service et par processus worker
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service_name, config):
+    """Client partagé (session poolée) pour un service de routage"""
+    client = _clients.get(service_name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(service_name)
+            if client is None:
+                client = _clients[service_name] = RoutingHttpClient(service_name, config)
+    return client
@@ -0,0 +1,208 @@
+# tools/sequencing.py - SÉQUENÇAGE DES ARRÊTS D'UNE TOURNÉE (CHEMIN OUVERT)
+import time
+from collections import deque
+
+import numpy as np
+
+# Taille des listes de voisins candidats pour la recherche locale
+NEIGHBOURS = 10
+
+# Longueur maximale des segments déplacés par Or-opt
+OR_OPT_MAX_SEGMENT = 3
+
+# Gain minimal pour accepter un mouvement (évite les boucles sur les égalités)
+EPSILON = 1e-7
+
+
+def nearest_neighbor_path(matrix, start=0):
+    """Construction du plus proche voisin vectorisée (une ligne de la matrice par pas)"""
+    size = len(matrix)
+    visited = np.zeros(size, dtype=bool)
+    visited[start] = True
+    current = start
+    path = [start]
+    for _step in range(size - 1):
+        candidates = np.where(visited, np.inf, matrix[current])
+        current = int(candidates.argmin())
+        visited[current] = True
+        path.append(current)
+    return path
+
+
+def path_cost(matrix, path):
+    """Coût d'un chemin ouvert (sans retour au départ)"""
+    path = np.asarray(path)
+    return float(np.asarray(matrix)[path[:-1], path[1:]].sum())
+
+
+def neighbour_lists(matrix, size=NEIGHBOURS):
+    """k voisins les plus proches de chaque nœud (coût symétrisé), triés"""
+    nodes = len(matrix)
+    size = min(size, nodes - 1)
+    if size <= 0:
+        return [[] for _ in range(nodes)]
+    costs = np.asarray(matrix, dtype=np.float64)
+    costs = costs + costs.T
+    np.fill_diagonal(costs, np.inf)
+    nearest = np.argpartition(costs, size - 1, axis=1)[:, :size]
+    order = np.argsort(np.take_along_axis(costs, nearest, axis=1), axis=1)
+    return np.take_along_axis(nearest, order, axis=1).tolist()
+
+
+class PathLocalSearch:
+    """2-opt et Or-opt sur un chemin ouvert dont le premier nœud est fixe
+
+    Les mouvements sont explorés depuis les listes de voisins; les bits
+    « don't look » (file des nœuds actifs) évitent de réexaminer les nœuds
+    dont l'entourage n'a pas changé. Les coûts peuvent être asymétriques:
+    le coût d'un segment inversé est obtenu par sommes préfixes.
+    """
+
+    def __init__(self, matrix, path, neighbours):
+        self.cost = np.asarray(matrix, dtype=np.float64).tolist()
+        self.path = list(path)
+        self.neighbours = neighbours
+        self._reindex()
+
+    def _reindex(self):
+        cost = self.cost
+        path = self.path
+        self.last = len(path) - 1
+        self.pos = [0] * len(path)
+        for index, node in enumerate(path):
+            self.pos[node] = index
+        # forward[k] / backward[k]: coût de path[0..k] parcouru dans chaque sens
+        self.forward = [0.0]
+        self.backward = [0.0]
+        for a, b in zip(path, path[1:]):
+            self.forward.append(self.forward[-1] + cost[a][b])
+            self.backward.append(self.backward[-1] + cost[b][a])
+
+    def _next_cost(self, index, node):
+        """Coût de node vers le successeur de la position index (0 en fin de chemin)"""
+        return self.cost[node][self.path[index + 1]] if index < self.last else 0.0
+
+    # ---------------------------------------------------------------
+    # 2-opt: inversion de path[i..j]
+    # ---------------------------------------------------------------
+
+    def _reverse_delta(self, i, j):
+        path, cost = self.path, self.cost
+        before = path[i - 1]
+        delta = cost[before][path[j]] - cost[before][path[i]]
+        delta += self._next_cost(j, path[i]) - self._next_cost(j, path[j])
+        delta += (self.backward[j] - self.backward[i]) - (self.forward[j] - self.forward[i])
+        return delta
+
+    def _two_opt(self, node):
+        position = self.pos[node]
+        for candidate in self.neighbours[node]:
+            other = self.pos[candidate]
+            if other > position + 1:
+                # node → candidate
+                i, j = position + 1, other
+            elif other < position - 1:
+                # candidate → node
+                i, j = other + 1, position
+            else:
+                continue
+            if self._reverse_delta(i, j) < -EPSILON:
+                touched = self._touched(i - 1, i, j, j + 1)
+                self.path[i:j + 1] = self.path[i:j + 1][::-1]
+                self._reindex()
+                return touched
+        return None
+
+    # ---------------------------------------------------------------
+    # Or-opt: déplacement de path[s..e] après la position j
+    # ---------------------------------------------------------------
+
+    def _move_delta(self, s, e, j):
+        path, cost = self.path, self.cost
+        before = path[s - 1]
+        delta = self._next_cost(e, before) - cost[before][path[s]] - self._next_cost(e, path[e])
+        delta += cost[path[j]][path[s]] + self._next_cost(j, path[e]) - self._next_cost(j, path[j])
+        return delta
+
+    def _or_opt(self, node):
+        position = self.pos[node]
+        if position == 0:
+            return None
+        for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+            # Segment commençant ou finissant par node
+            for s, e in ((position, position + length - 1), (position - length + 1, position)):
+                if s < 1 or e > self.last:
+                    continue
+                for candidate in self.neighbours[node]:
+                    other = self.pos[candidate]
+                    # Insertion juste après ou juste avant le candidat
+                    for j in (other, other - 1):
+                        if j < 0 or s - 1 <= j <= e:
+                            continue
+                        if self._move_delta(s, e, j) < -EPSILON:
+                            touched = self._touched(s - 1, s, e, e + 1, j, j + 1)
+                            segment = self.path[s:e + 1]
+                            if j > e:
+                                self.path[s:j + 1] = self.path[e + 1:j + 1] + segment
+                            else:
+                                self.path[j + 1:e + 1] = segment + self.path[j + 1:s]
+                            self._reindex()
+                            return touched
+        return None
+
+    def _touched(self, *positions):
+        return [self.path[p] for p in positions if 0 <= p <= self.last]
+
+    def run(self, deadline):
+        """Appliquer les mouvements améliorants jusqu'à l'optimum local ou l'échéance"""
+        queue = deque(self.path)
+        queued = [True] * len(self.path)
+        moves = 0
+        while queue and time.monotonic() < deadline:
+            node = queue.popleft()
+            queued[node] = False
+            touched = self._two_opt(node) or self._or_opt(node)
+            if not touched:
+                continue
+            moves += 1
+            for other in touched + [node]:
+                if not queued[other]:
+                    queued[other] = True
+                    queue.append(other)
+        return moves
+
+
+def seeded_path(matrix, start, initial):
+    """Chemin reprenant un ordre connu (ex: tournée précédente), les nœuds
+    absents étant ajoutés ensuite par plus proche voisin"""
+    path = [start] + [node for node in initial if node != start]
+    visited = np.zeros(len(matrix), dtype=bool)
+    visited[path] = True
+    current = path[-1]
+    for _step in range(len(matrix) - len(path)):
+        candidates = np.where(visited, np.inf, matrix[current])
+        current = int(candidates.argmin())
+        visited[current] = True
+        path.append(current)
+    return path
+
+
+def sequence_route(matrix, start=0, time_budget=1.0, neighbours=NEIGHBOURS, initial=None):
+    """Ordre de visite d'une tournée partant de start (sans retour)
+
+    Construction plus proche voisin (ou ordre initial s'il est moins
+    coûteux) puis 2-opt / Or-opt dans la limite de time_budget secondes.
+    Retourne la liste des nœuds visités après start.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    deadline = time.monotonic() + time_budget
+    path = nearest_neighbor_path(matrix, start)
+    if initial:
+        seeded = seeded_path(matrix, start, initial)
+        if path_cost(matrix, seeded) < path_cost(matrix, path):
+            path = seeded
+    if len(path) > 3:
+        search = PathLocalSearch(matrix, path, neighbour_lists(matrix, neighbours))
+        search.run(deadline)
+        path = search.path
+    return path[1:]
@@ -0,0 +1,70 @@
+# tools/spatial.py - INDEX SPATIAL DES PLUS PROCHES VOISINS (SPHÈRE UNITÉ)
+import numpy as np
+
+from . import geo
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy est optionnel, repli sur un produit scalaire par blocs
+    cKDTree = None
+
+# Nombre de requêtes par bloc pour le repli sans scipy (bloc x points float64)
+QUERY_CHUNK = 2048
+
+
+def to_unit_xyz(lats, lngs):
+    """Coordonnées (degrés) vers points 3D sur la sphère unité, tableau (N, 3)"""
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)], axis=1)
+
+
+def chord_to_meters(chord):
+    """Corde sur la sphère unité vers distance orthodromique (mètres)"""
+    return 2.0 * geo.EARTH_RADIUS_M * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+class NearestIndex:
+    """Index des points de référence (ex: dépôts des chauffeurs) construit une fois
+
+    Sur la sphère unité, le plus proche voisin en distance euclidienne 3D est
+    aussi le plus proche en distance orthodromique: un KD-tree scipy suffit.
+    """
+
+    def __init__(self, lats, lngs):
+        self.points = to_unit_xyz(lats, lngs)
+        self._tree = cKDTree(self.points) if cKDTree is not None and len(self.points) else None
+
+    def __len__(self):
+        return len(self.points)
+
+    def query(self, lats, lngs, k=1):
+        """Plus proches points de référence pour un lot de coordonnées
+
+        Retourne (indices, distances en mètres float64), de forme (M,) si k == 1,
+        sinon (M, k) triés du plus proche au plus lointain.
+        """
+        k = max(1, min(k, len(self.points)))
+        queries = to_unit_xyz(lats, lngs)
+
+        if self._tree is not None:
+            chords, indexes = self._tree.query(queries, k=k)
+            return indexes, chord_to_meters(chords)
+
+        indexes = np.empty((len(queries), k), dtype=np.int64)
+        chords = np.empty((len(queries), k))
+        for start in range(0, len(queries), QUERY_CHUNK):
+            # Plus grand produit scalaire = plus petit angle
+            dots = queries[start:start + QUERY_CHUNK] @ self.points.T
+            if k == 1:
+                best = dots.argmax(axis=1)[:, None]
+            else:
+                best = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+                best = np.take_along_axis(best, np.argsort(-np.take_along_axis(dots, best, axis=1), axis=1), axis=1)
+            indexes[start:start + len(best)] = best
+            chords[start:start + len(best)] = np.sqrt(np.clip(2.0 - 2.0 * np.take_along_axis(dots, best, axis=1), 0.0, None))
+
+        if k == 1:
+            return indexes[:, 0], chord_to_meters(chords[:, 0])
+        return indexes, chord_to_meters(chords)